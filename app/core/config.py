@@ -9,6 +9,7 @@ Config File for Defining:
 # Dependencies
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 from sqlalchemy.ext.declarative import declarative_base
 import os
 import logging
@@ -47,12 +48,75 @@ class Settings(BaseSettings):
     
     # Database Details
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+
+    # Drop every table on shutdown (ephemeral/dev databases only)
+    DROP_DB_ON_SHUTDOWN: bool = os.getenv("DROP_DB_ON_SHUTDOWN", False)
+
+    # Connection Pool (per worker process, per engine)
+    DB_POOL_SIZE: int = os.getenv("DB_POOL_SIZE", 25)
+    DB_MAX_OVERFLOW: int = os.getenv("DB_MAX_OVERFLOW", 25)
+    DB_POOL_TIMEOUT_SECONDS: float = os.getenv("DB_POOL_TIMEOUT_SECONDS", 30)
+    DB_POOL_RECYCLE_SECONDS: int = os.getenv("DB_POOL_RECYCLE_SECONDS", -1)
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", True)
+
+    # Optional Read Replica for public read-only routes
+    READ_DATABASE_URL: Optional[str] = os.getenv("READ_DATABASE_URL")
+    REPLICA_RETRY_SECONDS: int = os.getenv("REPLICA_RETRY_SECONDS", 30)
+    READ_YOUR_WRITES_SECONDS: int = os.getenv("READ_YOUR_WRITES_SECONDS", 10)
     
     # JWT Details
     ACCESS_TOKEN_EXPIRE_MINUTES: int = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
-    
+
+    # Verified Token Cache (TTL capped at 300s: the staleness bound when the change feed is down)
+    TOKEN_CACHE_TTL_SECONDS: int = os.getenv("TOKEN_CACHE_TTL_SECONDS", 60)
+    TOKEN_CACHE_MAX_SIZE: int = os.getenv("TOKEN_CACHE_MAX_SIZE", 1024)
+
+    # Stateless access tokens: authorize from JWT claims + in-memory revocation list
+    STATELESS_ACCESS_TOKENS: bool = os.getenv("STATELESS_ACCESS_TOKENS", False)
+    REVOCATION_REFRESH_SECONDS: int = os.getenv("REVOCATION_REFRESH_SECONDS", 30)
+
+    # Expired/Inactive Token Sweeper (interval 0 disables it)
+    TOKEN_SWEEP_INTERVAL_SECONDS: int = os.getenv("TOKEN_SWEEP_INTERVAL_SECONDS", 3600)
+    TOKEN_SWEEP_BATCH_SIZE: int = os.getenv("TOKEN_SWEEP_BATCH_SIZE", 1000)
+    TOKEN_RETENTION_DAYS: int = os.getenv("TOKEN_RETENTION_DAYS", 7)
+
+    # Batched AuthLog Writer
+    AUTH_LOG_BATCH_SIZE: int = os.getenv("AUTH_LOG_BATCH_SIZE", 100)
+    AUTH_LOG_FLUSH_INTERVAL_SECONDS: float = os.getenv("AUTH_LOG_FLUSH_INTERVAL_SECONDS", 1.0)
+    AUTH_LOG_QUEUE_SIZE: int = os.getenv("AUTH_LOG_QUEUE_SIZE", 10000)
+
+    # Login Throttling (sliding window per client IP and per username)
+    LOGIN_RATE_WINDOW_SECONDS: int = os.getenv("LOGIN_RATE_WINDOW_SECONDS", 60)
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", 20)
+    LOGIN_MAX_ATTEMPTS_PER_USER: int = os.getenv("LOGIN_MAX_ATTEMPTS_PER_USER", 5)
+    LOGIN_RATE_MAX_KEYS: int = os.getenv("LOGIN_RATE_MAX_KEYS", 10000)
+
+    # Reverse proxies whose X-Forwarded-For is trusted (comma separated IPs/CIDRs, empty = none)
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "")
+
+    # Content Change Feed (Postgres LISTEN/NOTIFY across workers)
+    CHANGE_FEED_ENABLED: bool = os.getenv("CHANGE_FEED_ENABLED", True)
+    CHANGE_FEED_HEALTHCHECK_SECONDS: float = os.getenv("CHANGE_FEED_HEALTHCHECK_SECONDS", 5)
+    CHANGE_FEED_MAX_BACKOFF_SECONDS: float = os.getenv("CHANGE_FEED_MAX_BACKOFF_SECONDS", 30)
+
+    # Public Content Listing Cache (TTL 0 disables it)
+    CONTENT_CACHE_TTL_SECONDS: int = os.getenv("CONTENT_CACHE_TTL_SECONDS", 300)
+    CONTENT_CACHE_MAX_ENTRIES: int = os.getenv("CONTENT_CACHE_MAX_ENTRIES", 256)
+    CONTENT_CACHE_MAX_BYTES: int = os.getenv("CONTENT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+    CONTENT_CACHE_COALESCE_TIMEOUT_SECONDS: int = os.getenv("CONTENT_CACHE_COALESCE_TIMEOUT_SECONDS", 10)
+    CONTENT_COMPRESS_MIN_BYTES: int = os.getenv("CONTENT_COMPRESS_MIN_BYTES", 1024)
+
+    # Cache-Control of the public content listings (responses carry ETags, so clients revalidate cheaply)
+    SERVICES_CACHE_CONTROL: str = os.getenv("SERVICES_CACHE_CONTROL", "public, max-age=30, stale-while-revalidate=300")
+    PORTFOLIO_CACHE_CONTROL: str = os.getenv("PORTFOLIO_CACHE_CONTROL", "public, max-age=30, stale-while-revalidate=300")
+    HERO_CACHE_CONTROL: str = os.getenv("HERO_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=600")
+
+    # Password Hashing Pool
+    HASH_POOL_WORKERS: int = os.getenv("HASH_POOL_WORKERS", 2)
+    HASH_POOL_MAX_PENDING: int = os.getenv("HASH_POOL_MAX_PENDING", 16)
+
     # Ibotix Admin Account
     ADMIN_EMAIL: str = os.getenv("ADMIN_EMAIL")
     ADMIN_PASS: str = os.getenv("ADMIN_PASS")
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import insert, func, bindparam, Interval
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import get_settings, get_logger
+from app.db.session import engine
+from app.db.models import AuthLog
+from app.db.enum import AuthEvent
+
+"""
+A script to define the batched, asynchronous AuthLog writer.
+
+Request handlers enqueue AuthLog events and return immediately; a single
+background task bulk-inserts them once AUTH_LOG_BATCH_SIZE events are queued
+or AUTH_LOG_FLUSH_INTERVAL_SECONDS have passed, and drains the queue on shutdown.
+
+Timestamps come from the database clock, like the auth_tokens.created_at they
+are matched against, set back by the time each event spent in the queue.
+"""
+
+# Loading Settings
+settings = get_settings()
+logger = get_logger()
+
+
+# Event time on the DB clock: now() minus the time spent queued
+insert_auth_logs = insert(AuthLog).values(timestamp=func.now() - bindparam("age", type_=Interval))
+
+
+class AuthLogWriter:
+
+    """
+    Collects AuthLog events in an in-process queue and writes them in multi-row INSERTs
+    """
+
+    def __init__(self, engine: AsyncEngine, batch_size: int, flush_interval: float, max_queue_size: int):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "dropped": 0, "failed": 0}
+
+    def log(self, user_id, event: AuthEvent, user_ip: Optional[str] = None, user_device: Optional[str] = None):
+
+        """
+        Enqueues an AuthLog event without waiting on the database.
+
+        Args:
+            user_id (uuid.UUID): The user the event belongs to.
+            event (AuthEvent): The authentication event.
+            user_ip (str, optional): The client IP address.
+            user_device (str, optional): The client User-Agent.
+        """
+
+        row = {
+            "user_id": user_id,
+            "event": event,
+            "queued_at": time.monotonic(),
+            "user_ip": user_ip,
+            "user_device": user_device,
+        }
+
+        # Writer not running (e.g. scripts, tests): nothing to hand the event to
+        if self._queue is None:
+            logger.error(f"AuthLog writer not started, dropping {event} event for user {user_id}")
+            self.stats["dropped"] += 1
+            return
+
+        try:
+            self._queue.put_nowait(row)
+            self.stats["enqueued"] += 1
+        except asyncio.QueueFull:
+            logger.error(f"AuthLog queue full, dropping {event} event for user {user_id}")
+            self.stats["dropped"] += 1
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+
+        """
+        Flushes every queued event and stops the background task.
+        """
+
+        if self._task is None:
+            return
+
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            row = await self._queue.get()
+            if row is None:
+                break
+
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        flushed_at = time.monotonic()
+        params = [
+            {**{key: value for key, value in row.items() if key != "queued_at"},
+             "age": timedelta(seconds=flushed_at - row["queued_at"])}
+            for row in batch
+        ]
+
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(insert_auth_logs, params)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} AuthLog events: {e}")
+            self.stats["failed"] += len(batch)
+
+
+# Process-wide writer instance
+auth_log_writer = AuthLogWriter(
+    engine,
+    batch_size=int(settings.AUTH_LOG_BATCH_SIZE),
+    flush_interval=float(settings.AUTH_LOG_FLUSH_INTERVAL_SECONDS),
+    max_queue_size=int(settings.AUTH_LOG_QUEUE_SIZE),
+)
@@ -0,0 +1,292 @@
+import asyncio
+import inspect
+import json
+import os
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import asyncpg
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings, get_logger
+from app.db.models import ContentVersion
+
+"""
+A script to define the cross-worker content change feed.
+
+Writes to content tables call notify_change inside their transaction, which
+issues a Postgres NOTIFY that is delivered to every listener when (and only
+if) the transaction commits. Each worker holds one dedicated LISTEN
+connection and dispatches every notification to the callbacks registered
+for that table, so in-process caches are evicted within milliseconds of an
+edit made on any worker.
+
+Notifications sent while a worker is disconnected are lost, so after every
+reconnect each callback is invoked with ids=None, meaning "flush everything
+for this table".
+
+The same transaction bumps the table's row in content_versions and the new
+version travels in the payload, so every connected worker knows the current
+version of each table without a query (listing ETags are built from it).
+"""
+
+# Loading Settings
+settings = get_settings()
+logger = get_logger()
+
+CHANGE_CHANNEL = "content_changes"
+
+# NOTIFY payloads are capped at 8000 bytes; larger batches flush the whole table
+MAX_PAYLOAD_BYTES = 7900
+
+# Callback(table, ids): ids is None for a full flush of the table
+ChangeCallback = Callable[[str, Optional[List[uuid.UUID]]], object]
+
+
+async def notify_change(db: AsyncSession, table: str, action: str, ids: Optional[Iterable[uuid.UUID]] = None) -> int:
+
+    """
+    Bumps the table's content version and queues a change notification in the session's
+    transaction; both take effect on commit.
+
+    Concurrent writers to the same table queue on the content_versions row lock until
+    the first one commits, which keeps versions in commit order.
+
+    Args:
+        db (AsyncSession): The session performing the write.
+        table (str): The table that changed.
+        action (str): create, update or delete.
+        ids (Iterable[uuid.UUID], optional): The changed rows; None for the whole table.
+
+    Returns:
+        int: The new content version of the table.
+    """
+
+    stmt = (
+        insert(ContentVersion)
+        .values(table_name=table, version=1)
+        .on_conflict_do_update(
+            index_elements=[ContentVersion.table_name],
+            set_={"version": ContentVersion.version + 1, "updated_at": func.now()},
+        )
+        .returning(ContentVersion.version)
+    )
+    version = (await db.execute(stmt)).scalar_one()
+    await db.execute(change_notification(table, action, ids, version))
+    return version
+
+
+def change_notification(table: str, action: str, ids: Optional[Iterable[uuid.UUID]] = None,
+                        version: Optional[int] = None):
+
+    """
+    Builds the NOTIFY statement for a change; executed inside a transaction, it is only
+    delivered if that transaction commits. Tables without content versions (auth_tokens)
+    send it directly.
+
+    Args:
+        table (str): The table that changed.
+        action (str): What happened, e.g. update or revoke.
+        ids (Iterable[uuid.UUID], optional): The changed rows; None for the whole table.
+        version (int, optional): The table's new content version.
+
+    Returns:
+        Select: The pg_notify statement.
+    """
+
+    message = {"table": table, "action": action, "version": version,
+               "ids": [str(id) for id in ids] if ids is not None else None}
+    payload = json.dumps(message, separators=(",", ":"))
+
+    if len(payload) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps({**message, "ids": None}, separators=(",", ":"))
+
+    return select(func.pg_notify(CHANGE_CHANNEL, payload))
+
+
+async def get_content_version(db: AsyncSession, table: str) -> int:
+    result = await db.execute(select(ContentVersion.version).where(ContentVersion.table_name == table))
+    return result.scalar() or 0
+
+
+class ChangeListener:
+
+    """
+    Holds the LISTEN connection of this worker and dispatches notifications to per-table callbacks
+    """
+
+    def __init__(self, dsn: str, healthcheck_interval: float, max_backoff: float):
+        self.dsn = dsn
+        self.healthcheck_interval = healthcheck_interval
+        self.max_backoff = max_backoff
+        self._callbacks: Dict[str, List[ChangeCallback]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+        # Content versions as of the last notification; only trusted while connected
+        self._versions: Dict[str, int] = {}
+
+        # Counters
+        self.stats = {
+            "connected": False,
+            "notifications": 0,
+            "invalid": 0,
+            "callback_errors": 0,
+            "reconnects": 0,
+            "full_flushes": 0,
+            "last_error": None,
+            "last_notification_at": None,
+        }
+
+    def on(self, *tables: str):
+
+        """
+        Decorator registering a callback for changes to the given tables.
+
+        Args:
+            *tables (str): Table names.
+        """
+
+        def register(callback: ChangeCallback):
+            for table in tables:
+                self._callbacks.setdefault(table, []).append(callback)
+            return callback
+
+        return register
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def version(self, table: str) -> Optional[int]:
+
+        """
+        Returns the current content version of a table, or None while disconnected
+        (notifications may have been missed, so the last known version can be stale).
+
+        Args:
+            table (str): The table name.
+        """
+
+        if not self.stats["connected"]:
+            return None
+        return self._versions.get(table, 0)
+
+    def observe(self, table: str, version: int):
+
+        """
+        Records a version this worker committed itself (the value notify_change returned), so
+        it is known before the worker's own NOTIFY comes back.
+
+        Args:
+            table (str): The table name.
+            version (int): The committed content version.
+        """
+
+        self._versions[table] = max(self._versions.get(table, 0), version)
+
+    async def flush_all(self):
+        self.stats["full_flushes"] += 1
+        for table in self._callbacks:
+            await self._dispatch(table, None)
+
+    async def _run(self):
+        backoff = 1.0
+        missed = False
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(CHANGE_CHANNEL, self._on_notification)
+
+                # Listening first, so no version committed after this read is missed
+                for row in await conn.fetch("SELECT table_name, version FROM content_versions"):
+                    self._versions[row["table_name"]] = max(self._versions.get(row["table_name"], 0), row["version"])
+
+                self.stats["connected"] = True
+                backoff = 1.0
+                logger.info(f"Change feed listening on '{CHANGE_CHANNEL}' (pid {os.getpid()})")
+
+                # Anything sent while disconnected was missed
+                if missed:
+                    self.stats["reconnects"] += 1
+                    await self.flush_all()
+                    missed = False
+
+                # Idle until the connection drops; a periodic query detects half-open sockets
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.healthcheck_interval)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(conn.fetchval("SELECT 1"), self.healthcheck_interval)
+
+                raise ConnectionError("LISTEN connection closed")
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                self.stats["last_error"] = f"{e.__class__.__name__}: {e}"
+                missed = True
+                logger.error(f"Change feed disconnected, retrying in {backoff:.0f}s: {e}")
+
+            finally:
+                self.stats["connected"] = False
+                self._versions.clear()
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            message = json.loads(payload)
+            table = message["table"]
+            ids = [uuid.UUID(id) for id in message["ids"]] if message.get("ids") is not None else None
+            version = int(message["version"]) if message.get("version") is not None else None
+        except (ValueError, KeyError, TypeError):
+            self.stats["invalid"] += 1
+            logger.error(f"Ignoring malformed change notification: {payload!r}")
+            return
+
+        self.stats["notifications"] += 1
+        self.stats["last_notification_at"] = time.time()
+        if version is not None:
+            self._versions[table] = max(self._versions.get(table, 0), version)
+
+        task = asyncio.get_running_loop().create_task(self._dispatch(table, ids))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _dispatch(self, table: str, ids: Optional[List[uuid.UUID]]):
+        for callback in self._callbacks.get(table, ()):
+            try:
+                result = callback(table, ids)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.stats["callback_errors"] += 1
+                logger.error(f"Change feed callback {callback.__name__} failed for {table}: {e}")
+
+
+# Process-wide listener (connects straight to the primary; replicas do not relay NOTIFY)
+change_listener = ChangeListener(
+    dsn=settings.DATABASE_URL.replace("postgresql+asyncpg", "postgresql"),
+    healthcheck_interval=float(settings.CHANGE_FEED_HEALTHCHECK_SECONDS),
+    max_backoff=float(settings.CHANGE_FEED_MAX_BACKOFF_SECONDS),
+)
@@ -0,0 +1,376 @@
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Type
+from fastapi import UploadFile
+from pydantic import BaseModel, ValidationError, create_model
+from sqlalchemy import select, insert, update, delete, values, column, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
+from app.core.config import get_logger
+from app.db.models import Service, Portfolio, HeroSection
+from app.db.schema import ServiceCreate, PortfolioCreate, HeroCreate, BulkItemResult, BulkResult
+from app.db.enum import ContentType
+from app.utility.CustomException import CustomHttpException
+from app.utility.prefix_index import suggest_index
+from app.utility.uploads import save_upload, remove_upload
+from app.utility.content_cache import content_cache
+from app.db.change_feed import notify_change, change_listener
+
+"""
+A script to define the bulk create/update/delete operations on content tables.
+
+A batch is validated item by item first; invalid items are reported and
+skipped. The valid ones are then written with a single multi-row statement
+in one transaction (INSERT ... VALUES (...), (...); UPDATE ... FROM (VALUES
+...); DELETE ... WHERE id IN (...)), and every item gets its own result.
+
+Images travel as multipart parts: an item's image field holds the filename
+of one of the uploaded files (or, on update, the item's own current URL to
+keep it). Other URLs are rejected, so a batch can never point a row at a
+file it does not own and later delete it.
+"""
+
+logger = get_logger()
+
+BULK_MAX_ITEMS = 100
+
+
+@dataclass(frozen=True)
+class ContentSpec:
+
+    """
+    Describes a content table for the bulk operations
+    """
+
+    model: type
+    schema: Type[BaseModel]
+    label: str
+    image_fields: Tuple[str, ...]
+    required_images: Tuple[str, ...] = ()
+    content_type: Optional[ContentType] = None
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(self.schema.model_fields)
+
+    @cached_property
+    def update_schema(self) -> Type[BaseModel]:
+        # Every field optional; None leaves the column unchanged
+        return create_model(
+            f"{self.schema.__name__}BulkUpdate",
+            id=(uuid.UUID, ...),
+            **{name: (Optional[info.annotation], None) for name, info in self.schema.model_fields.items()},
+        )
+
+
+SERVICE_CONTENT = ContentSpec(Service, ServiceCreate, "Service", ("image1", "image2"),
+                              content_type=ContentType.SERVICE)
+PORTFOLIO_CONTENT = ContentSpec(Portfolio, PortfolioCreate, "Portfolio Item", ("image",),
+                                required_images=("image",), content_type=ContentType.PORTFOLIO)
+HERO_CONTENT = ContentSpec(HeroSection, HeroCreate, "Hero Section", ("image",),
+                           required_images=("image",))
+
+
+@change_listener.on(Service.__tablename__, Portfolio.__tablename__, HeroSection.__tablename__)
+def invalidate_content_cache(table: str, ids: Optional[List[uuid.UUID]]):
+    # Listings are cached per query, not per row, so any change drops the whole table
+    content_cache.invalidate(table)
+
+
+def parse_bulk_items(items: str) -> List[dict]:
+
+    """
+    Parses the `items` form field of a bulk request.
+
+    Args:
+        items (str): A JSON array of objects.
+
+    Returns:
+        List[dict]: The items.
+
+    Raises:
+        CustomHttpException: 400 if the field is not a JSON array of objects or has too many items.
+    """
+
+    try:
+        parsed = json.loads(items)
+    except ValueError:
+        parsed = None
+
+    if not isinstance(parsed, list) or not all(isinstance(item, dict) for item in parsed):
+        raise CustomHttpException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="items must be a JSON array of objects",
+            message="Invalid Bulk Request",
+        )
+
+    check_batch_size(len(parsed))
+    return parsed
+
+
+def check_batch_size(size: int):
+    if size > BULK_MAX_ITEMS:
+        raise CustomHttpException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"A bulk request accepts at most {BULK_MAX_ITEMS} items",
+            message="Invalid Bulk Request",
+        )
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+def image_reference_error(spec: ContentSpec, item: dict, uploads: Dict[str, UploadFile], current=None) -> Optional[str]:
+    # `current` is the row being updated (None when creating); only its own URLs may be kept
+    for field in spec.image_fields:
+        ref = item.get(field)
+        if ref is None:
+            if current is None and field in spec.required_images:
+                return f"{field} is required"
+            continue
+        if not isinstance(ref, str) or (ref not in uploads and (current is None or ref != getattr(current, field))):
+            return f"No uploaded file named {ref!r} for {field}"
+    return None
+
+
+def store_images(spec: ContentSpec, item: dict, uploads: Dict[str, UploadFile], saved: List[str]):
+    for field in spec.image_fields:
+        ref = item.get(field)
+        if ref in uploads:
+            item[field] = save_upload(uploads[ref])
+            saved.append(item[field])
+
+
+def bulk_result(results: List[BulkItemResult]) -> BulkResult:
+    failed = sum(1 for result in results if result.status == "error")
+    return BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+
+async def write_batch(db: AsyncSession, stmt, params, saved: List[str], action: str, spec: ContentSpec, ids: List[uuid.UUID]):
+
+    """
+    Executes a batch statement, notifies the change feed and commits; on failure rolls back
+    and removes the images saved for the batch.
+    """
+
+    try:
+        result = await db.execute(stmt, params) if params is not None else await db.execute(stmt)
+        rows = result.all() if result.returns_rows else []
+        version = await notify_change(db, spec.model.__tablename__, action, ids)
+        await db.commit()
+        change_listener.observe(spec.model.__tablename__, version)
+        content_cache.invalidate(spec.model.__tablename__)
+        return rows
+
+    except Exception as e:
+        await db.rollback()
+        for url in saved:
+            remove_upload(url)
+        logger.error(f"Bulk {action} of {spec.label} failed: {e}")
+        raise CustomHttpException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Bulk {action} failed: {str(e)}",
+            message="Internal Server Error",
+        )
+
+
+async def bulk_create(db: AsyncSession, spec: ContentSpec, items: List[dict], files: Optional[List[UploadFile]]) -> BulkResult:
+
+    """
+    Creates many content items with one multi-row INSERT.
+
+    Args:
+        db (AsyncSession): The database session.
+        spec (ContentSpec): The content table.
+        items (List[dict]): The items to create.
+        files (List[UploadFile], optional): The uploaded images referenced by the items.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+
+    uploads = {upload.filename: upload for upload in files or []}
+    results: List[Optional[BulkItemResult]] = [None] * len(items)
+    rows: List[Tuple[int, dict]] = []
+    saved: List[str] = []
+
+    # Items keep the order they were submitted in
+    started_at = (await db.execute(select(func.localtimestamp()))).scalar()
+
+    for index, item in enumerate(items):
+        error = image_reference_error(spec, item, uploads)
+        if error is None:
+            try:
+                item = spec.schema.model_validate(item).model_dump()
+                store_images(spec, item, uploads, saved)
+            except ValidationError as e:
+                error = validation_message(e)
+            except OSError as e:
+                error = f"Image upload failed: {str(e)}"
+
+        if error is not None:
+            results[index] = BulkItemResult(index=index, status="error", detail=error)
+            continue
+
+        item["id"] = uuid.uuid4()
+        item["created_at"] = started_at + timedelta(microseconds=index)
+        rows.append((index, item))
+
+    if rows:
+        await write_batch(db, insert(spec.model), [item for _, item in rows], saved, "create", spec,
+                          [item["id"] for _, item in rows])
+
+    for index, item in rows:
+        results[index] = BulkItemResult(index=index, id=item["id"], status="created")
+        if spec.content_type:
+            suggest_index.add(spec.content_type, item["id"], item["title"], item.get("category"))
+
+    return bulk_result(results)
+
+
+async def bulk_update(db: AsyncSession, spec: ContentSpec, items: List[dict], files: Optional[List[UploadFile]]) -> BulkResult:
+
+    """
+    Updates many content items with one UPDATE ... FROM (VALUES ...). Fields left out
+    (or null) keep their current value, as with the single-item update.
+
+    Args:
+        db (AsyncSession): The database session.
+        spec (ContentSpec): The content table.
+        items (List[dict]): The changes, each with the `id` of the item to update.
+        files (List[UploadFile], optional): The uploaded images referenced by the items.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+
+    model = spec.model
+    uploads = {upload.filename: upload for upload in files or []}
+    results: List[Optional[BulkItemResult]] = [None] * len(items)
+    changes: Dict[uuid.UUID, Tuple[int, dict]] = {}
+
+    for index, item in enumerate(items):
+        error = None
+        try:
+            change = spec.update_schema.model_validate(item).model_dump()
+            if change["id"] in changes:
+                error = "Duplicate id in batch"
+        except ValidationError as e:
+            error = validation_message(e)
+
+        if error is not None:
+            results[index] = BulkItemResult(index=index, status="error", detail=error)
+            continue
+
+        changes[change["id"]] = (index, change)
+
+    # Current image URLs, to delete the files of replaced images after the commit
+    existing = {}
+    if changes:
+        result = await db.execute(
+            select(model.id, *[getattr(model, field) for field in spec.image_fields]).where(model.id.in_(list(changes)))
+        )
+        existing = {row.id: row for row in result.all()}
+
+    saved: List[str] = []
+    rows: List[Tuple[int, dict]] = []
+    for id, (index, change) in changes.items():
+        if id not in existing:
+            results[index] = BulkItemResult(index=index, id=id, status="error", detail=f"{spec.label} not found")
+            continue
+        error = image_reference_error(spec, change, uploads, current=existing[id])
+        if error is not None:
+            results[index] = BulkItemResult(index=index, id=id, status="error", detail=error)
+            continue
+        try:
+            store_images(spec, change, uploads, saved)
+        except OSError as e:
+            results[index] = BulkItemResult(index=index, id=id, status="error", detail=f"Image upload failed: {str(e)}")
+            continue
+        rows.append((index, change))
+
+    if rows:
+        table = model.__table__
+        names = ("id",) + spec.fields
+        batch = values(*[column(name, table.c[name].type) for name in names], name="batch").data(
+            [tuple(change[name] for name in names) for _, change in rows]
+        )
+        stmt = (
+            update(model)
+            .where(model.id == batch.c.id)
+            .values({name: func.coalesce(batch.c[name], table.c[name]) for name in spec.fields})
+            .returning(*[table.c[name] for name in names])
+        )
+        changed = [change["id"] for _, change in rows]
+        updated = {row.id: row for row in await write_batch(db, stmt, None, saved, "update", spec, changed)}
+
+        stored = set(saved)
+        for index, change in rows:
+            row = updated.get(change["id"])
+
+            # Deleted between the SELECT above and the UPDATE: drop the images saved for it
+            if row is None:
+                results[index] = BulkItemResult(index=index, id=change["id"], status="error", detail=f"{spec.label} not found")
+                for field in spec.image_fields:
+                    if change.get(field) in stored:
+                        remove_upload(change[field])
+                continue
+
+            results[index] = BulkItemResult(index=index, id=row.id, status="updated")
+
+            for field in spec.image_fields:
+                old_url = getattr(existing[row.id], field)
+                if old_url and old_url != getattr(row, field):
+                    remove_upload(old_url)
+
+            if spec.content_type:
+                suggest_index.add(spec.content_type, row.id, row.title, row.category)
+
+    return bulk_result(results)
+
+
+async def bulk_delete(db: AsyncSession, spec: ContentSpec, ids: List[uuid.UUID]) -> BulkResult:
+
+    """
+    Deletes many content items with one DELETE ... RETURNING, then removes their images.
+
+    Args:
+        db (AsyncSession): The database session.
+        spec (ContentSpec): The content table.
+        ids (List[uuid.UUID]): The ids of the items to delete.
+
+    Returns:
+        BulkResult: The outcome of every id, in request order.
+    """
+
+    check_batch_size(len(ids))
+    model = spec.model
+
+    stmt = (
+        delete(model)
+        .where(model.id.in_(set(ids)))
+        .returning(model.id, *[getattr(model, field) for field in spec.image_fields])
+    )
+    deleted = {row.id: row for row in await write_batch(db, stmt, None, [], "delete", spec, list(set(ids)))} if ids else {}
+
+    results = []
+    seen = set()
+    for index, id in enumerate(ids):
+        if id in seen:
+            results.append(BulkItemResult(index=index, id=id, status="error", detail="Duplicate id in batch"))
+        elif id not in deleted:
+            results.append(BulkItemResult(index=index, id=id, status="error", detail=f"{spec.label} not found"))
+        else:
+            results.append(BulkItemResult(index=index, id=id, status="deleted"))
+        seen.add(id)
+
+    for row in deleted.values():
+        for field in spec.image_fields:
+            remove_upload(getattr(row, field))
+        suggest_index.remove(row.id)
+
+    return bulk_result(results)
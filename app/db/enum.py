@@ -31,4 +31,11 @@ class AuthEvent(Enum):
     LOGOUT = 'logout'
     FORGOT_PASS = 'forgot_pass'
     def __str__(self):
-        return self.value
\ No newline at end of file
+        return self.value
+
+class ContentType(Enum):
+    SERVICE = 'service'
+    PORTFOLIO = 'portfolio'
+
+    def __str__(self):
+        return self.value
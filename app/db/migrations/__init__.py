@@ -0,0 +1,89 @@
+import time
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.core.config import get_logger
+from app.db.models import SchemaVersion
+from . import (v0001_baseline, v0002_index_overhaul, v0003_content_ordering, v0004_search_vectors, v0005_content_versions,
+               v0006_drop_raw_tokens, v0007_refresh_jti, v0008_session_client)
+
+"""
+A script to define the versioned schema migrations.
+
+Each revision is a module exposing `version`, `description` and an async
+`upgrade(conn)`. Revisions run in order, each in its own transaction
+together with its schema_version stamp, so an interrupted run resumes from
+the first revision that did not commit. To change the schema, add a new
+vNNNN module and append it to MIGRATIONS; never edit a shipped one.
+
+Every worker migrates on boot, so each transaction first takes a Postgres
+advisory lock and re-reads the stamped version under it: workers booting
+together queue on the lock, and each skips the revisions another worker
+applied while it waited.
+"""
+
+logger = get_logger()
+
+MIGRATIONS = [
+    v0001_baseline,
+    v0002_index_overhaul,
+    v0003_content_ordering,
+    v0004_search_vectors,
+    v0005_content_versions,
+    v0006_drop_raw_tokens,
+    v0007_refresh_jti,
+    v0008_session_client,
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# Advisory lock key serializing schema changes across workers (arbitrary, fixed)
+MIGRATION_LOCK_KEY = 1_500_100_015
+
+
+async def lock_schema(conn: AsyncConnection):
+
+    """
+    Takes the migration lock for the rest of `conn`'s transaction.
+
+    Args:
+        conn (AsyncConnection): A connection inside a transaction.
+    """
+
+    await conn.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK_KEY)))
+
+
+async def run_migrations(engine: AsyncEngine) -> int:
+
+    """
+    Applies every revision newer than the version the database is stamped with.
+
+    Args:
+        engine (AsyncEngine): The engine to migrate.
+
+    Returns:
+        int: The number of revisions applied by this call.
+    """
+
+    async with engine.begin() as conn:
+        await lock_schema(conn)
+        await conn.run_sync(lambda sync_conn: SchemaVersion.__table__.create(sync_conn, checkfirst=True))
+
+    applied = 0
+    for migration in MIGRATIONS:
+        async with engine.begin() as conn:
+            await lock_schema(conn)
+
+            current_version = await conn.scalar(select(func.max(SchemaVersion.version)))
+            if current_version is not None and migration.version <= current_version:
+                continue
+
+            logger.info(f"Applying schema revision {migration.version}: {migration.description}")
+            started = time.perf_counter()
+
+            await migration.upgrade(conn)
+            await conn.execute(SchemaVersion.__table__.insert().values(version=migration.version))
+
+        applied += 1
+        logger.info(f"Schema revision {migration.version} applied in {time.perf_counter() - started:.3f}s")
+
+    return applied
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+from typing import Dict
+from sqlalchemy import text
+from app.db.session import engine, get_schema_version, create_database_if_not_exists
+from app.db.migrations import LATEST_VERSION, run_migrations
+
+"""
+Command line entry point for the schema migrations:
+
+    python -m app.db.migrations current            # Stamped and latest versions
+    python -m app.db.migrations explain            # EXPLAIN ANALYZE the hot queries
+    python -m app.db.migrations upgrade --explain  # Benchmark, migrate, benchmark again
+"""
+
+# The queries the indexes are designed for, with representative probe values. Each maps the first
+# schema version it applies from to its SQL, so an older database (0: unversioned legacy layout)
+# is probed with the query it actually serves: token lookups by the raw token before revision 1,
+# unordered category filters before revision 3, and no full-text search before revision 4.
+HOT_QUERIES = {
+    "active_user": {
+        0: """
+            SELECT users.id FROM users JOIN auth_tokens ON auth_tokens.user_id = users.id
+            WHERE users.email = 'probe@example.com' AND users.user_status = 'ACTIVE'
+              AND auth_tokens.token = 'probe'
+              AND auth_tokens.status = 'ACTIVE' AND auth_tokens.expires_at > now()
+            LIMIT 1
+        """,
+        1: """
+            SELECT users.id FROM users JOIN auth_tokens ON auth_tokens.user_id = users.id
+            WHERE users.email = 'probe@example.com' AND users.user_status = 'ACTIVE'
+              AND auth_tokens.token_digest = sha256('probe'::bytea)
+              AND auth_tokens.status = 'ACTIVE' AND auth_tokens.expires_at > now()
+            LIMIT 1
+        """,
+    },
+    "user_sessions": {
+        0: """
+            SELECT auth_tokens.id FROM auth_tokens
+            WHERE auth_tokens.user_id = (SELECT id FROM users LIMIT 1) AND auth_tokens.status = 'ACTIVE'
+            ORDER BY auth_tokens.id DESC LIMIT 20
+        """,
+    },
+    "token_sweep": {
+        0: """
+            SELECT auth_tokens.id FROM auth_tokens
+            WHERE auth_tokens.expires_at < now() - interval '7 days'
+               OR (auth_tokens.status = 'INACTIVE' AND auth_tokens.updated_at < now() - interval '7 days')
+            LIMIT 1000
+        """,
+    },
+    "services_page": {
+        0: """
+            SELECT services.id FROM services WHERE services.category = 'probe'
+        """,
+        3: """
+            SELECT services.id FROM services WHERE services.category = 'probe'
+            ORDER BY services.created_at, services.id LIMIT 21
+        """,
+    },
+    "portfolios_page": {
+        0: """
+            SELECT portfolios.id FROM portfolios WHERE portfolios.category = 'probe'
+        """,
+        3: """
+            SELECT portfolios.id FROM portfolios WHERE portfolios.category = 'probe'
+              AND (portfolios.created_at, portfolios.id) > (now() - interval '1 day', '00000000-0000-0000-0000-000000000000'::uuid)
+            ORDER BY portfolios.created_at, portfolios.id LIMIT 21
+        """,
+    },
+    "search": {
+        4: """
+            SELECT services.id, ts_rank_cd(services.search_vector, websearch_to_tsquery('english', 'probe')) AS rank
+            FROM services WHERE services.search_vector @@ websearch_to_tsquery('english', 'probe')
+            ORDER BY rank DESC LIMIT 21
+        """,
+    },
+}
+
+
+def hot_queries(version: int) -> Dict[str, str]:
+
+    """
+    Picks the variant of every hot query that a database at `version` serves.
+
+    Args:
+        version (int): The stamped schema version (0 for an unversioned database).
+
+    Returns:
+        Dict[str, str]: Query name -> SQL, without the queries the schema does not support yet.
+    """
+
+    queries = {}
+    for name, variants in HOT_QUERIES.items():
+        applicable = [since for since in variants if since <= version]
+        if applicable:
+            queries[name] = variants[max(applicable)]
+    return queries
+
+
+async def explain(version: int = LATEST_VERSION):
+
+    """
+    Prints the plan and timing of every hot query a database at `version` serves.
+
+    Args:
+        version (int, optional): The stamped schema version. Defaults to LATEST_VERSION.
+    """
+
+    async with engine.connect() as conn:
+        for name, query in hot_queries(version).items():
+            result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"))
+            print(f"-- {name}")
+            for (line,) in result:
+                print(line)
+            print()
+
+
+async def has_tables() -> bool:
+    async with engine.connect() as conn:
+        return await conn.scalar(text("SELECT to_regclass('auth_tokens') IS NOT NULL"))
+
+
+async def main(args):
+    version = await get_schema_version()
+
+    if args.command == "current":
+        print(f"current: {version}, latest: {LATEST_VERSION}")
+
+    elif args.command == "explain":
+        await explain(version or 0)
+
+    elif args.command == "upgrade":
+        if version is None:
+            await create_database_if_not_exists()
+        # Unversioned databases are benchmarked too (legacy layout), unless they are still empty
+        if args.explain and (version is not None or await has_tables()):
+            print(f"=== Before (version {version or 'unversioned'}) ===")
+            await explain(version or 0)
+        applied = await run_migrations(engine)
+        print(f"Applied {applied} revision(s), now at version {LATEST_VERSION}")
+        if args.explain:
+            print(f"=== After (version {LATEST_VERSION}) ===")
+            await explain()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    parser.add_argument("command", choices=["current", "explain", "upgrade"])
+    parser.add_argument("--explain", action="store_true", help="EXPLAIN ANALYZE the hot queries before and after upgrading")
+    asyncio.run(main(parser.parse_args()))
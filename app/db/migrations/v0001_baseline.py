@@ -0,0 +1,244 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.core.config import get_logger
+
+"""
+Revision 1: baseline layout.
+
+Creates the tables as they stood when versioned migrations were introduced,
+spelled out as DDL so the revision never changes when the models do (later
+revisions take the schema from here). Databases created before versioning
+already have some or all of these tables, so every statement is guarded,
+and an auth_tokens table created before token digests existed is brought
+up to the digest/jti layout.
+"""
+
+logger = get_logger()
+
+version = 1
+description = "Baseline tables and auth_tokens digest layout"
+
+enum_types = {
+    "usertype": ("ADMIN", "BROKER", "BROKER_ALIAS", "AGENT"),
+    "userstatus": ("ACTIVE", "INACTIVE", "PENDING", "DELETED"),
+    "authevent": ("REGISTER", "LOGIN", "LOGOUT", "FORGOT_PASS"),
+    "tokenstatus": ("ACTIVE", "INACTIVE"),
+}
+
+tables = [
+    """
+    CREATE TABLE IF NOT EXISTS hero_sections (
+        id UUID NOT NULL,
+        title VARCHAR,
+        subtitle VARCHAR,
+        image VARCHAR NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS portfolios (
+        id UUID NOT NULL,
+        title VARCHAR NOT NULL,
+        category VARCHAR,
+        description VARCHAR,
+        image VARCHAR,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS prospects (
+        id UUID NOT NULL,
+        name VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        password VARCHAR NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS services (
+        id UUID NOT NULL,
+        title VARCHAR NOT NULL,
+        category VARCHAR,
+        heading1 VARCHAR,
+        heading2 VARCHAR,
+        detail1 VARCHAR,
+        detail2 VARCHAR,
+        image1 VARCHAR,
+        image2 VARCHAR,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id UUID NOT NULL,
+        user_type usertype NOT NULL,
+        name VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        password VARCHAR NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        first_login BOOLEAN NOT NULL,
+        pass_reset_token VARCHAR,
+        user_status userstatus NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS admin_profiles (
+        user_id UUID NOT NULL,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS auth_logs (
+        id SERIAL NOT NULL,
+        timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        event authevent NOT NULL,
+        user_id UUID NOT NULL,
+        user_ip VARCHAR,
+        user_device VARCHAR,
+        created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS auth_tokens (
+        id SERIAL NOT NULL,
+        token VARCHAR,
+        refresh_token VARCHAR NOT NULL,
+        token_digest BYTEA,
+        refresh_token_digest BYTEA,
+        jti VARCHAR(36),
+        user_id UUID NOT NULL,
+        expires_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() + make_interval(secs => 86400.0),
+        status tokenstatus,
+        created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (token),
+        UNIQUE (refresh_token),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS broker_profiles (
+        user_id UUID NOT NULL,
+        broker_key VARCHAR NOT NULL,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS broker_alias_profiles (
+        user_id UUID NOT NULL,
+        broker_id UUID NOT NULL,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (broker_id) REFERENCES broker_profiles (user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agent_profiles (
+        user_id UUID NOT NULL,
+        broker_id UUID NOT NULL,
+        broker_alias_id UUID,
+        prospect_id VARCHAR,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (broker_id) REFERENCES broker_profiles (user_id),
+        FOREIGN KEY (broker_alias_id) REFERENCES broker_alias_profiles (user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS broker_agent_association (
+        broker_id UUID NOT NULL,
+        agent_id UUID NOT NULL,
+        PRIMARY KEY (broker_id, agent_id),
+        FOREIGN KEY (broker_id) REFERENCES broker_profiles (user_id),
+        FOREIGN KEY (agent_id) REFERENCES agent_profiles (user_id)
+    )
+    """,
+]
+
+# Columns added to auth_tokens tables created before token digests and jti existed
+legacy_columns = [
+    "ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS token_digest BYTEA",
+    "ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS refresh_token_digest BYTEA",
+    "ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS jti VARCHAR(36)",
+]
+
+indexes = [
+    "CREATE INDEX IF NOT EXISTS ix_hero_sections_id ON hero_sections (id)",
+    "CREATE INDEX IF NOT EXISTS ix_portfolios_id ON portfolios (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_prospects_email ON prospects (email)",
+    "CREATE INDEX IF NOT EXISTS ix_services_id ON services (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_password ON users (password)",
+    "CREATE INDEX IF NOT EXISTS ix_users_user_status ON users (user_status)",
+    "CREATE INDEX IF NOT EXISTS ix_users_user_type ON users (user_type)",
+    "CREATE INDEX IF NOT EXISTS ix_auth_logs_user_id_timestamp ON auth_logs (user_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS ix_auth_tokens_expires_at ON auth_tokens (expires_at)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_auth_tokens_jti ON auth_tokens (jti)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_auth_tokens_refresh_token_digest ON auth_tokens (refresh_token_digest)",
+    "CREATE INDEX IF NOT EXISTS ix_auth_tokens_status ON auth_tokens (status)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_auth_tokens_token_digest ON auth_tokens (token_digest)",
+    "CREATE INDEX IF NOT EXISTS ix_auth_tokens_user_id_status ON auth_tokens (user_id, status)",
+]
+
+# Pre-digest rows: compute the digests their lookups now go through, one id range at a time
+BACKFILL_BATCH_SIZE = 10000
+
+backfill = """
+    UPDATE auth_tokens
+    SET token_digest = sha256(convert_to(token, 'UTF8')),
+        refresh_token_digest = CASE WHEN refresh_token IS NULL THEN NULL
+                                    ELSE sha256(convert_to(refresh_token, 'UTF8')) END
+    WHERE token_digest IS NULL AND token IS NOT NULL
+      AND id >= :start AND id < :stop
+"""
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Creates the enum types, tables and indexes that are missing, then adds the digest and
+    jti columns to a pre-digest auth_tokens table and backfills its digests.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for name, labels in enum_types.items():
+        values = ", ".join(f"'{label}'" for label in labels)
+        await conn.execute(text(
+            f"DO $$ BEGIN CREATE TYPE {name} AS ENUM ({values}); "
+            f"EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+        ))
+
+    for stmt in tables + legacy_columns + indexes:
+        await conn.execute(text(stmt))
+
+    # Pre-digest tables declared token NOT NULL; only they pay for the ACCESS EXCLUSIVE lock
+    token_not_null = await conn.scalar(text(
+        "SELECT attnotnull FROM pg_attribute "
+        "WHERE attrelid = 'auth_tokens'::regclass AND attname = 'token' AND NOT attisdropped"
+    ))
+    if token_not_null:
+        await conn.execute(text("ALTER TABLE auth_tokens ALTER COLUMN token DROP NOT NULL"))
+
+    bounds = (await conn.execute(text(
+        "SELECT min(id), max(id) FROM auth_tokens WHERE token_digest IS NULL AND token IS NOT NULL"
+    ))).one()
+    if bounds[0] is None:
+        return
+
+    migrated = 0
+    for start in range(bounds[0], bounds[1] + 1, BACKFILL_BATCH_SIZE):
+        result = await conn.execute(text(backfill), {"start": start, "stop": start + BACKFILL_BATCH_SIZE})
+        migrated += max(result.rowcount, 0)
+        logger.info(f"Migrated {migrated} auth_tokens rows to digest layout (through id {start + BACKFILL_BATCH_SIZE - 1})")
@@ -0,0 +1,53 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 2: index overhaul matched to the hot queries.
+
+Dropped:
+    - ix_users_password: passwords are only ever compared after an email lookup
+    - ix_services_id / ix_portfolios_id / ix_hero_sections_id: duplicates of the primary keys
+    - ix_auth_tokens_status: two-valued column, never selective on its own
+    - ix_auth_tokens_token_digest: superseded by ix_auth_tokens_token_lookup
+
+Added:
+    - ix_auth_tokens_token_lookup: unique (token_digest) INCLUDE (status, expires_at, user_id),
+      so get_active_user's token/status/expiry check is answered from the index
+    - ix_auth_tokens_user_id_status: session listing and logout-all
+    - ix_auth_tokens_expires_at / ix_auth_tokens_inactive_updated_at: the sweeper's two branches
+    - ix_services_category / ix_portfolios_category: category filters
+"""
+
+version = 2
+description = "Index overhaul for token lookups, sweeper and category filters"
+
+statements = [
+    "DROP INDEX IF EXISTS ix_users_password",
+    "DROP INDEX IF EXISTS ix_services_id",
+    "DROP INDEX IF EXISTS ix_portfolios_id",
+    "DROP INDEX IF EXISTS ix_hero_sections_id",
+    "DROP INDEX IF EXISTS ix_auth_tokens_status",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_auth_tokens_token_lookup "
+    "ON auth_tokens (token_digest) INCLUDE (status, expires_at, user_id)",
+    "DROP INDEX IF EXISTS ix_auth_tokens_token_digest",
+    "CREATE INDEX IF NOT EXISTS ix_auth_tokens_user_id_status ON auth_tokens (user_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_auth_tokens_expires_at ON auth_tokens (expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_auth_tokens_inactive_updated_at "
+    "ON auth_tokens (updated_at) WHERE status = 'INACTIVE'",
+    "CREATE INDEX IF NOT EXISTS ix_services_category ON services (category)",
+    "CREATE INDEX IF NOT EXISTS ix_portfolios_category ON portfolios (category)",
+]
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Swaps the indexes in a single transaction, so a failure leaves the previous set intact.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
+    await conn.execute(text("ANALYZE auth_tokens"))
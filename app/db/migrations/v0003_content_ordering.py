@@ -0,0 +1,40 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 3: stable ordering for the content list endpoints.
+
+Adds created_at to services, portfolios and hero_sections and indexes
+(created_at, id), plus (category, created_at, id) for the category
+filter, which supersedes the single-column category indexes. Rows that
+predate the column all get the migration time; id breaks the tie.
+"""
+
+version = 3
+description = "created_at and keyset pagination indexes on content tables"
+
+statements = [
+    "ALTER TABLE services ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT now()",
+    "ALTER TABLE portfolios ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT now()",
+    "ALTER TABLE hero_sections ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT now()",
+    "CREATE INDEX IF NOT EXISTS ix_services_created_at_id ON services (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_services_category_created_at_id ON services (category, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_portfolios_created_at_id ON portfolios (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_portfolios_category_created_at_id ON portfolios (category, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_hero_sections_created_at_id ON hero_sections (created_at, id)",
+    "DROP INDEX IF EXISTS ix_services_category",
+    "DROP INDEX IF EXISTS ix_portfolios_category",
+]
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Adds the columns and swaps the indexes in a single transaction.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
@@ -0,0 +1,46 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 4: full-text search over services and portfolios.
+
+Adds a stored generated tsvector column to each table (so Postgres keeps
+it current on every insert and update) and a GIN index over it. Adding
+the column rewrites the table once to compute the vector for existing rows.
+"""
+
+version = 4
+description = "Generated search_vector columns with GIN indexes"
+
+statements = [
+    """
+    ALTER TABLE services ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(heading1, '') || ' ' || coalesce(heading2, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(detail1, '') || ' ' || coalesce(detail2, '')), 'C')
+    ) STORED
+    """,
+    """
+    ALTER TABLE portfolios ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_services_search_vector ON services USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_portfolios_search_vector ON portfolios USING gin (search_vector)",
+]
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Adds the columns and indexes in a single transaction.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
@@ -0,0 +1,36 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 5: per-table content versions.
+
+Adds the content_versions table. Every write to a content table bumps its
+row in the same transaction, and listing ETags are derived from it. Rows
+are created by the first write, so an absent row reads as version 0.
+"""
+
+version = 5
+description = "content_versions table for listing ETags"
+
+statements = [
+    """
+    CREATE TABLE IF NOT EXISTS content_versions (
+        table_name VARCHAR PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+    """,
+]
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Creates the table.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
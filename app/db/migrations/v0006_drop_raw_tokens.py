@@ -0,0 +1,32 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 6: raw JWTs are no longer kept in auth_tokens.
+
+Every lookup goes through the digest columns, so the raw token and
+refresh_token columns (and the two wide unique B-trees behind their
+UNIQUE constraints) are dropped. Dropping a column only touches the
+catalog, so the ACCESS EXCLUSIVE lock is held for milliseconds and the
+table is not rewritten.
+"""
+
+version = 6
+description = "Drop the raw token columns of auth_tokens"
+
+statements = [
+    "ALTER TABLE auth_tokens DROP COLUMN IF EXISTS token, DROP COLUMN IF EXISTS refresh_token",
+]
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Drops the columns and their unique constraints.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
@@ -0,0 +1,30 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 7: auth_tokens records the jti of the refresh token too.
+
+Revoking a session then revokes both of its tokens by id. The column is
+nullable and has no default, so adding it only touches the catalog; rows
+issued before it keep a NULL refresh_jti.
+"""
+
+version = 7
+description = "Add auth_tokens.refresh_jti"
+
+statements = [
+    "ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS refresh_jti VARCHAR(36)",
+]
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Adds the column.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
@@ -0,0 +1,51 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+"""
+Revision 8: auth_tokens records the client that opened the session.
+
+Session listings used to pair each token with the latest LOGIN log written
+within a few seconds of its creation; the row now carries the IP and
+User-Agent itself, copied forward on every refresh. Both columns are
+nullable without a default, so adding them only touches the catalog. The
+active rows are backfilled once with the old time-window match.
+"""
+
+version = 8
+description = "Add auth_tokens.user_ip and auth_tokens.user_device"
+
+statements = [
+    "ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS user_ip VARCHAR, ADD COLUMN IF NOT EXISTS user_device VARCHAR",
+]
+
+backfill = """
+    UPDATE auth_tokens
+    SET user_ip = login_log.user_ip, user_device = login_log.user_device
+    FROM auth_tokens AS session
+    CROSS JOIN LATERAL (
+        SELECT auth_logs.user_ip, auth_logs.user_device
+        FROM auth_logs
+        WHERE auth_logs.user_id = session.user_id
+          AND auth_logs.event = 'LOGIN'
+          AND auth_logs.timestamp <= session.created_at + interval '5 seconds'
+        ORDER BY auth_logs.timestamp DESC
+        LIMIT 1
+    ) AS login_log
+    WHERE auth_tokens.id = session.id
+      AND session.status = 'ACTIVE'
+      AND session.expires_at > now()
+"""
+
+
+async def upgrade(conn: AsyncConnection):
+
+    """
+    Adds the columns and backfills the active sessions.
+
+    Args:
+        conn (AsyncConnection): The connection (inside the migration transaction) to run on.
+    """
+
+    for stmt in statements:
+        await conn.execute(text(stmt))
+    await conn.execute(text(backfill))
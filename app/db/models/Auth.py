@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Integer, String, DateTime, ForeignKey, Enum, func
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Enum, LargeBinary, Index, func, text
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 from .UserBase import *
 from datetime import timedelta
@@ -20,14 +20,28 @@ Tables:
 class AuthToken(Base):
 
     __tablename__ = 'auth_tokens'
+    __table_args__ = (
+        # Per-request token lookup, answered from the index alone
+        Index('ix_auth_tokens_token_lookup', 'token_digest', unique=True,
+              postgresql_include=['status', 'expires_at', 'user_id']),
+        # Per-user session listing and bulk revocation
+        Index('ix_auth_tokens_user_id_status', 'user_id', 'status'),
+        # Sweeper: revoked rows past the retention window
+        Index('ix_auth_tokens_inactive_updated_at', 'updated_at',
+              postgresql_where=text("status = 'INACTIVE'")),
+    )
 
     # Details
     id: Mapped[str] = mapped_column(Integer, primary_key=True)
-    token: Mapped[str] = mapped_column(String(), unique=True, nullable=False)
-    refresh_token: Mapped[str] = mapped_column(String(), unique=True,)
+    token_digest: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=True)
+    refresh_token_digest: Mapped[bytes] = mapped_column(LargeBinary(32), unique=True, index=True, nullable=True)
+    jti: Mapped[str] = mapped_column(String(36), unique=True, index=True, nullable=True)
+    refresh_jti: Mapped[str] = mapped_column(String(36), nullable=True)
+    user_ip: Mapped[str] = mapped_column(String(), nullable=True)
+    user_device: Mapped[str] = mapped_column(String(), nullable=True)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('users.id'), nullable=False)
-    expires_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True, server_default=func.now() + timedelta(days=1))
-    status: Mapped[TokenStatus] = mapped_column(Enum(TokenStatus), index=True, nullable=True, default=TokenStatus.ACTIVE)
+    expires_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True, index=True, server_default=func.now() + timedelta(days=1))
+    status: Mapped[TokenStatus] = mapped_column(Enum(TokenStatus), nullable=True, default=TokenStatus.ACTIVE)
     created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
     
@@ -38,6 +52,10 @@ class AuthToken(Base):
 class AuthLog(Base):
     
     __tablename__ = 'auth_logs'
+    __table_args__ = (
+        # Latest log per user lookups
+        Index('ix_auth_logs_user_id_timestamp', 'user_id', 'timestamp'),
+    )
 
     # Details
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
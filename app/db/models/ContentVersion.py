@@ -0,0 +1,16 @@
+from app.core.config import Base
+from sqlalchemy import String, BigInteger, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+class ContentVersion(Base):
+    
+    """
+    Table counting the committed writes to each content table (the source of listing ETags)
+    """
+    
+    __tablename__ = "content_versions"
+    
+    table_name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
@@ -1,7 +1,8 @@
 from app.core.config import Base
-from sqlalchemy import String, UUID
+from sqlalchemy import String, UUID, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 import uuid
+from datetime import datetime
 
 class HeroSection(Base):
     
@@ -10,8 +11,13 @@ class HeroSection(Base):
     """
     
     __tablename__ = "hero_sections"
+    __table_args__ = (
+        # Keyset pagination
+        Index('ix_hero_sections_created_at_id', 'created_at', 'id'),
+    )
     
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, index=True)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     title: Mapped[str] = mapped_column(String, nullable=True)
     subtitle: Mapped[str] = mapped_column(String, nullable=True)
     image: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
@@ -1,7 +1,15 @@
 from app.core.config import Base
-from sqlalchemy import String, Column, UUID
+from sqlalchemy import String, Column, UUID, DateTime, Index, Computed, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 import uuid
+from datetime import datetime
+
+PORTFOLIO_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
 
 class Portfolio(Base):
     
@@ -10,9 +18,20 @@ class Portfolio(Base):
     """
     
     __tablename__ = "portfolios"
+    __table_args__ = (
+        # Keyset pagination, optionally within a category
+        Index('ix_portfolios_created_at_id', 'created_at', 'id'),
+        Index('ix_portfolios_category_created_at_id', 'category', 'created_at', 'id'),
+        # Full-text search
+        Index('ix_portfolios_search_vector', 'search_vector', postgresql_using='gin'),
+    )
     
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, index=True)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
     title: Mapped[str] = mapped_column(String, nullable=False)
     category: Mapped[str] = mapped_column(String, nullable=True)
     description: Mapped[str] = mapped_column(String, nullable=True)
     image: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    
+    # Weighted full-text document, maintained by Postgres on every insert/update
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(PORTFOLIO_SEARCH_VECTOR, persisted=True), nullable=True, deferred=True)
@@ -0,0 +1,15 @@
+from app.core.config import Base
+from sqlalchemy import Integer, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+class SchemaVersion(Base):
+    
+    """
+    Table recording the schema versions applied to this database
+    """
+    
+    __tablename__ = "schema_version"
+    
+    version: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
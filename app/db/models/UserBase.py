@@ -43,7 +43,7 @@ class User(Base):
     user_type: Mapped[UserType] = mapped_column(Enum(UserType), nullable=False, index=True)  
     name: Mapped[str] = mapped_column(String, default=None, nullable=False)  
     email: Mapped[str] = mapped_column(String, default=None, unique=True, nullable=False, index=True)  
-    password: Mapped[str] = mapped_column(String, nullable=False, index=True)  
+    password: Mapped[str] = mapped_column(String, nullable=False)  
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)  
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), server_onupdate=func.now(), nullable=False)  
     
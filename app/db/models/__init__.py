@@ -4,6 +4,8 @@ from .UserBase import *
 from .Service import *
 from .Portfolio import *
 from .HeroSection import *
+from .SchemaVersion import *
+from .ContentVersion import *
 
 # Automatically populate __all__ to include all classes inheriting from Base
 __all__ = [
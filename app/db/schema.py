@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, ConfigDict
 import datetime
 from typing import List, Optional
-from app.db.enum import UserStatus, UserType, AuthEvent
+from app.db.enum import UserStatus, UserType, AuthEvent, ContentType
 from starlette.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED
 import uuid
 
@@ -89,6 +89,20 @@ class RefreshTokenResponse(BaseModel):
     refresh_token: str
     token_type: str = "Bearer"
 
+# Response Schema for an Active Session
+class SessionRead(BaseModel):
+    id: int
+    created_at: datetime.datetime
+    expires_at: datetime.datetime
+    user_ip: Optional[str] = None
+    user_device: Optional[str] = None
+    current: bool = False
+
+# Response Schema for the Session Listing
+class SessionList(BaseModel):
+    sessions: List[SessionRead]
+    next_cursor: Optional[int] = None
+
 # Service Schemas
 class ServiceBase(BaseModel):
     title: str
@@ -150,4 +164,46 @@ class HeroUpdate(HeroBase):
     pass
 
 class HeroResponse(HeroBase):
-    id: uuid.UUID
\ No newline at end of file
+    id: uuid.UUID
+
+# Search Schemas
+class SearchResult(BaseModel):
+    type: ContentType
+    id: uuid.UUID
+    title: str
+    category: Optional[str] = None
+    image: Optional[str] = None
+    rank: float
+    snippet: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class SearchResults(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int] = None
+
+# Suggestion Schema
+class SuggestResult(BaseModel):
+    type: ContentType
+    id: uuid.UUID
+    title: str
+    category: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+# Bulk Write Schemas
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[uuid.UUID] = None
+    status: str
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class BulkDelete(BaseModel):
+    ids: List[uuid.UUID]
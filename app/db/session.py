@@ -1,21 +1,117 @@
 import asyncpg
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import select, func
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import get_settings, get_logger
-from typing import AsyncGenerator 
+from typing import AsyncContextManager, AsyncGenerator, AsyncIterator, Callable
 from app.core.config import Base
 from app.db.models import *
 from app.db.enum import UserStatus, UserType
 from app.utility.misc import get_password_hash
+from app.db.migrations import LATEST_VERSION, run_migrations, lock_schema
 
 # Loading Settings
 settings = get_settings()
 logger = get_logger()
 
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    
+    """
+    Queue pool that records how long each checkout waited for a connection
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+def build_engine(url: str):
+    
+    """
+    Creates an async engine whose pool is sized and tuned from Settings.
+
+    Args:
+        url (str): The database URL.
+
+    Returns:
+        AsyncEngine: The configured engine.
+    """
+    
+    return create_async_engine(url, echo=False, future=True,
+                               poolclass=TimedQueuePool,
+                               pool_size=int(settings.DB_POOL_SIZE),
+                               max_overflow=int(settings.DB_MAX_OVERFLOW),
+                               pool_timeout=float(settings.DB_POOL_TIMEOUT_SECONDS),
+                               pool_recycle=int(settings.DB_POOL_RECYCLE_SECONDS),
+                               pool_pre_ping=bool(settings.DB_POOL_PRE_PING))
+
+
+def pool_stats(engine) -> dict:
+    
+    """
+    Live connection pool counters for this worker process.
+
+    Args:
+        engine (AsyncEngine): The engine whose pool to report.
+
+    Returns:
+        dict: Pool size, checked-out/idle/overflow connections and checkout wait times.
+    """
+    
+    pool = engine.pool
+    return {
+        "pid": os.getpid(),
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "checkouts": pool.checkouts,
+        "wait_avg_ms": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+        "wait_max_ms": round(pool.wait_max * 1000, 3),
+    }
+
+
 # Create Async Engine
-engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True, 
-                             pool_size=25, max_overflow=25, pool_pre_ping=True)
+engine = build_engine(settings.DATABASE_URL)
+
+# Process-wide session factories. An AsyncSession only checks a pooled connection
+# out when its first statement runs, so requests that fail auth or never query
+# the database cost no checkout.
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async_read_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+# Optional read replica for public read-only routes
+read_engine = None
+async_replica_session = None
+if settings.READ_DATABASE_URL:
+    read_engine = build_engine(settings.READ_DATABASE_URL)
+    async_replica_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+# Set on write responses; while present, reads from that client go to the primary
+READ_PRIMARY_COOKIE = "Read_primary"
+replica_down_until = 0.0
+
+# Opens a read-only session when called (see get_read_session_factory)
+ReadSessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
 
 
 async def create_database_if_not_exists():
@@ -38,32 +134,65 @@ async def create_database_if_not_exists():
     result = await conn.fetchval(f"SELECT 1 FROM pg_database WHERE datname = '{target_db_name}'")
     
     if not result:
-        # If the database does not exist, create it
-        await conn.execute(f'CREATE DATABASE "{target_db_name}"')
-        logger.info(f"Database '{target_db_name}' created successfully!")
+        # If the database does not exist, create it (another worker may be doing the same)
+        try:
+            await conn.execute(f'CREATE DATABASE "{target_db_name}"')
+            logger.info(f"Database '{target_db_name}' created successfully!")
+        except asyncpg.DuplicateDatabaseError:
+            logger.info(f"Database '{target_db_name}' was created by another worker.")
     else:
         logger.info(f"Database '{target_db_name}' already exists.")
     
     await conn.close()
 
 
+# Schema version lookup
+async def get_schema_version():
+    
+    """
+    Asynchronous function to read the schema version stamped on the database.
+
+    Returns:
+        int | None: The latest applied version, or None if the database or the
+        schema_version table does not exist yet.
+    """
+    
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(select(func.max(SchemaVersion.version)))
+            return result.scalar()
+    
+    except Exception as e:
+        logger.info(f"Schema version unavailable ({e.__class__.__name__}), running full initialization")
+        return None
+
+
 # Async db initiation
 async def init_db():
     
     """
     Asynchronous function to initialize the database.
     
-    This function is responsible for checking if the database exists, creating it if not,
-    and then creating the tables based on the Base class.
+    Fast path: a single version query; if the database is already stamped with
+    the latest migration nothing else runs. Otherwise this function checks if the
+    database exists, creates it if not, applies the pending migrations (the
+    baseline revision creates the tables) and seeds the Ibotix admin. Both
+    steps serialize on the migration lock, so workers can boot together.
     """
     
-    logger.info("Checking if the database exists or needs to be created...")
-    await create_database_if_not_exists()  # Ensure the database exists before proceeding
+    version = await get_schema_version()
+    if version == LATEST_VERSION:
+        logger.info(f"Database schema at version {LATEST_VERSION}, skipping initialization")
+        return
     
-    async with engine.begin() as conn:
-        logger.info("Creating tables in the database if they don't exist...")
-        await conn.run_sync(Base.metadata.create_all)
-        logger.info("Tables created successfully!")
+    if version is None:
+        logger.info("Checking if the database exists or needs to be created...")
+        await create_database_if_not_exists()  # Ensure the database exists before proceeding
+    
+    applied = await run_migrations(engine)
+    logger.info(f"Applied {applied} schema revision(s), database at version {LATEST_VERSION}")
+    
+    await Add_Ibotix_Admin(get_session())
 
 # Async Session Generator
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -71,27 +200,114 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Asynchronous generator to create a new session object.
 
-    This asynchronous generator creates a new session object using the sessionmaker
-    and the async engine. It uses an asynchronous context manager to ensure that
+    This asynchronous generator creates a new session object from the process-wide
+    session factory. It uses an asynchronous context manager to ensure that
     the session is properly closed when it is no longer needed.
 
     Yields:
         AsyncSession: A new session object.
     """
     
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
     async with async_session() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
+
+# Replica session with primary fallback
+async def get_replica_session():
+    
+    """
+    Opens a session on the read replica and checks a connection out right away, so an
+    unreachable replica is detected before the session is used. On failure the replica
+    is skipped for REPLICA_RETRY_SECONDS.
+
+    Returns:
+        AsyncSession | None: A replica session, or None if the replica is unavailable.
+    """
+    
+    global replica_down_until
+    session = async_replica_session()
+    
+    try:
+        await session.connection()
+        return session
+    
+    except Exception as e:
+        await session.close()
+        replica_down_until = time.monotonic() + int(settings.REPLICA_RETRY_SECONDS)
+        logger.error(f"Read replica unavailable, falling back to primary: {e}")
+        return None
+
+# Read-only session, on the replica when one is configured and usable
+@asynccontextmanager
+async def open_read_session(prefer_primary: bool = False) -> AsyncIterator[AsyncSession]:
+    
+    """
+    Opens a session for read-only work.
+
+    The session never autoflushes and is never committed; closing it simply
+    returns the connection (if one was checked out) to the pool. When a read
+    replica is configured it serves these reads, except for clients that wrote
+    within the last READ_YOUR_WRITES_SECONDS (`prefer_primary`) or while the
+    replica is marked unavailable.
+
+    Args:
+        prefer_primary (bool, optional): Read from the primary. Defaults to False.
+
+    Yields:
+        AsyncSession: A new read-only session object.
+    """
+    
+    session = None
+    if (async_replica_session is not None
+            and not prefer_primary
+            and time.monotonic() >= replica_down_until):
+        session = await get_replica_session()
+    
+    if session is None:
+        session = async_read_session()
+    
+    async with session:
+        yield session
+
+# Async Read-Only Session Generator
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    
+    """
+    Asynchronous generator to create a session for read-only routes that always query.
+    Clients carrying the Read_primary cookie read from the primary.
+
+    Args:
+        request (Request): The incoming request.
+
+    Yields:
+        AsyncSession: A new read-only session object.
+    """
+    
+    async with open_read_session(READ_PRIMARY_COOKIE in request.cookies) as session:
+        yield session
+
+# Lazy Read-Only Session Factory
+def get_read_session_factory(request: Request) -> ReadSessionFactory:
+    
+    """
+    Dependency for cached read routes: returns a factory opening a read-only session
+    (as get_read_session would) only when called, so requests answered from the
+    content cache or with a 304 never check a connection out.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        ReadSessionFactory: Opens the session, as an async context manager.
+    """
+    
+    return partial(open_read_session, READ_PRIMARY_COOKIE in request.cookies)
             
 async def drop_db():
     """
     Asynchronous function to drop all tables in the database.
     
-    This is useful for testing or resetting the database state.
+    This is useful for testing or resetting the database state. Only called on
+    shutdown when DROP_DB_ON_SHUTDOWN is enabled.
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -103,6 +319,9 @@ async def Add_Ibotix_Admin(db: AsyncSession = get_session()):
     ADMIN_PASS = settings.ADMIN_PASS
     
     async for session in db:
+        
+        # Serialize with other booting workers until the admin is committed
+        await lock_schema(await session.connection())
     
         # Checking if admin already exists
         existing_admin = await session.execute(
@@ -0,0 +1,470 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import uuid
+from sqlalchemy import select, insert, update, delete, literal, cast, or_, and_, func, true, event
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, object_session
+from typing import Iterable, List, Optional
+from jose import jwt
+from app.core.config import get_settings, get_logger
+from app.db.change_feed import change_listener, change_notification
+from app.db.models import AuthToken, User
+from app.db.enum import TokenStatus, UserStatus
+from app.utility.misc import hash_token
+from app.utility.revocation import revocation_list
+from app.utility.token_cache import token_cache
+
+"""
+A script to define how issued tokens are persisted in and looked up from auth_tokens.
+
+Every row stores the SHA-256 digest of its access and refresh tokens, never the
+raw JWTs, and all lookups go through the fixed-size, indexed digest columns.
+It also records the IP and User-Agent of the login that opened the session,
+carried forward on every refresh.
+
+Expired and INACTIVE rows are removed by a background sweeper once they are
+older than TOKEN_RETENTION_DAYS.
+
+In stateless mode the access and refresh `jti` of recently deactivated rows,
+and the ids of users who are not ACTIVE, are periodically loaded into the
+in-memory revocation list.
+
+Revoking sessions or changing a user's status evicts the user's verified
+tokens from this worker's cache once the transaction commits, and from every
+other worker's through an auth_tokens notification on the change feed sent
+in the same transaction. Only while a worker's feed is disabled or
+disconnected can it keep accepting a revoked token from its cache, for at
+most TOKEN_CACHE_TTL_SECONDS (capped in token_cache); it flushes the cache
+on reconnect.
+"""
+
+# Loading Settings
+settings = get_settings()
+logger = get_logger()
+
+STATELESS_ACCESS_TOKENS = bool(settings.STATELESS_ACCESS_TOKENS)
+ACCESS_TOKEN_LIFETIME_SECONDS = int(settings.ACCESS_TOKEN_EXPIRE_MINUTES) * 60
+
+# Sweeper metrics
+sweeper_stats = {
+    "runs": 0,
+    "errors": 0,
+    "rows_removed_total": 0,
+    "last_run_rows_removed": 0,
+    "last_run_seconds": 0.0,
+    "last_run_at": None,
+}
+
+# Columns used to look tokens up (every row carries digests since schema version 1)
+access_token_column = AuthToken.token_digest
+refresh_token_column = AuthToken.refresh_token_digest
+
+
+def token_key(token: str) -> bytes:
+
+    """
+    Returns the value to compare against access_token_column / refresh_token_column.
+
+    Args:
+        token (str): The raw JWT.
+
+    Returns:
+        bytes: The token digest.
+    """
+
+    return hash_token(token)
+
+
+def token_row_values(token: str, refresh_token: str) -> dict:
+
+    """
+    Column values identifying a newly issued token pair.
+
+    Args:
+        token (str): The access token.
+        refresh_token (str): The refresh token.
+
+    Returns:
+        dict: The digests and jti of both tokens.
+    """
+
+    return {
+        "jti": jwt.get_unverified_claims(token).get("jti"),
+        "refresh_jti": jwt.get_unverified_claims(refresh_token).get("jti"),
+        "token_digest": hash_token(token),
+        "refresh_token_digest": hash_token(refresh_token),
+    }
+
+
+def new_auth_token(user_id, token: str, refresh_token: str, expires_at, user_ip: Optional[str] = None,
+                   user_device: Optional[str] = None) -> AuthToken:
+
+    """
+    Builds an ACTIVE AuthToken row for a newly issued token pair.
+    """
+
+    return AuthToken(
+        user_id=user_id,
+        status=TokenStatus.ACTIVE,
+        expires_at=expires_at,
+        user_ip=user_ip,
+        user_device=user_device,
+        **token_row_values(token, refresh_token),
+    )
+
+
+async def rotate_refresh_token(db: AsyncSession, refresh_token: str, token: str, new_refresh_token: str,
+                               expires_at) -> Optional[Row]:
+
+    """
+    Atomically rotates a refresh token in one round trip.
+
+    A single statement deactivates the ACTIVE, unexpired row holding `refresh_token` and,
+    from the row it returns, inserts the new token pair for the same client:
+
+        WITH rotated AS (UPDATE auth_tokens SET status = 'INACTIVE' WHERE ... RETURNING ...),
+             issued AS (INSERT INTO auth_tokens (...) SELECT ... FROM rotated RETURNING id)
+        SELECT ... FROM rotated JOIN issued ON true
+
+    Concurrent rotations of the same token serialize on the row lock; the losers re-check
+    `status = ACTIVE` after the winner commits, match nothing and insert nothing.
+
+    Args:
+        db (AsyncSession): The database session (the caller commits).
+        refresh_token (str): The refresh token presented by the client.
+        token (str): The new access token.
+        new_refresh_token (str): The new refresh token.
+        expires_at: Expiry of the new row (value or SQL expression).
+
+    Returns:
+        Row | None: (user_id, token_digest, jti and refresh_jti of the old row, id of the new row),
+        or None if the refresh token could not be rotated.
+    """
+
+    rotated = (
+        update(AuthToken)
+        .where(
+            refresh_token_column == token_key(refresh_token),
+            AuthToken.status == TokenStatus.ACTIVE,
+            AuthToken.expires_at > func.now(),
+        )
+        .values(status=TokenStatus.INACTIVE)
+        .returning(AuthToken.user_id, AuthToken.token_digest, AuthToken.jti, AuthToken.refresh_jti,
+                   AuthToken.user_ip, AuthToken.user_device)
+        .cte("rotated")
+    )
+
+    # Explicit casts: bare parameters in a SELECT list reach Postgres untyped
+    columns = AuthToken.__table__.c
+    values = token_row_values(token, new_refresh_token)
+    issued = (
+        insert(AuthToken)
+        .from_select(
+            ["user_id", "user_ip", "user_device", "status", "expires_at", *values],
+            select(
+                rotated.c.user_id,
+                rotated.c.user_ip,
+                rotated.c.user_device,
+                cast(literal(TokenStatus.ACTIVE, columns.status.type), columns.status.type),
+                expires_at,
+                *[cast(literal(value, columns[name].type), columns[name].type) for name, value in values.items()],
+            ),
+        )
+        .returning(AuthToken.id)
+        .cte("issued")
+    )
+
+    stmt = (
+        select(rotated.c.user_id, rotated.c.token_digest, rotated.c.jti, rotated.c.refresh_jti, issued.c.id)
+        .select_from(rotated)
+        .join(issued, true())
+    )
+    result = await db.execute(stmt)
+    return result.first()
+
+
+async def revoke_tokens(db: AsyncSession, *criteria) -> List[Row]:
+
+    """
+    Deactivates every ACTIVE token matching `criteria` with one set-based UPDATE. Once the
+    caller has committed, it passes the returned rows to forget_revoked.
+
+    Args:
+        db (AsyncSession): The database session (the caller commits).
+        *criteria: Extra WHERE clauses, e.g. AuthToken.user_id == user.id.
+
+    Returns:
+        List[Row]: (token_digest, jti, refresh_jti) of every revoked token.
+    """
+
+    stmt = (
+        update(AuthToken)
+        .where(AuthToken.status == TokenStatus.ACTIVE, *criteria)
+        .values(status=TokenStatus.INACTIVE)
+        .returning(AuthToken.token_digest, AuthToken.jti, AuthToken.refresh_jti)
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def notify_sessions_changed(db: AsyncSession, user_ids: Iterable[uuid.UUID]):
+
+    """
+    Queues, in the caller's transaction, the notification that makes every worker drop the
+    cached tokens of these users once it commits.
+
+    Args:
+        db (AsyncSession): The session performing the revocation (the caller commits).
+        user_ids (Iterable[uuid.UUID]): The users whose sessions changed.
+    """
+
+    await db.execute(change_notification(AuthToken.__tablename__, "revoke", user_ids))
+
+
+@change_listener.on(AuthToken.__tablename__)
+def evict_changed_sessions(table: str, user_ids: Optional[List[uuid.UUID]]):
+    # None: notifications may have been missed (reconnect), drop everything
+    if user_ids is None:
+        token_cache.clear()
+        return
+    for user_id in user_ids:
+        token_cache.invalidate_user(user_id)
+
+
+# User status changes: recorded on the session, broadcast in its transaction, applied after commit
+@event.listens_for(User.user_status, "set")
+def track_status_change(target, value, oldvalue, initiator):
+    if target.id is None or value == oldvalue:
+        return
+
+    session = object_session(target)
+    if session is None:
+        token_cache.invalidate_user(target.id)
+        revocation_list.set_user_active(target.id, value == UserStatus.ACTIVE)
+        return
+    session.info.setdefault("user_status_changes", {})[target.id] = value
+
+
+@event.listens_for(Session, "before_commit")
+def broadcast_status_changes(session: Session):
+    changes = session.info.get("user_status_changes")
+    if changes:
+        session.connection().execute(change_notification(AuthToken.__tablename__, "revoke", list(changes)))
+
+
+@event.listens_for(Session, "after_commit")
+def apply_status_changes(session: Session):
+    for user_id, status in session.info.pop("user_status_changes", {}).items():
+        token_cache.invalidate_user(user_id)
+        revocation_list.set_user_active(user_id, status == UserStatus.ACTIVE)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_status_changes(session: Session):
+    session.info.pop("user_status_changes", None)
+
+
+def forget_revoked(revoked: List[Row]):
+
+    """
+    Drops committed revocations from the verified-token cache and adds them to this worker's
+    revocation list. Called after the commit, so a concurrent request cannot re-cache a token
+    whose row the database still shows as ACTIVE.
+
+    Args:
+        revoked (List[Row]): The rows returned by revoke_tokens.
+    """
+
+    for row in revoked:
+        token_cache.invalidate_digest(row.token_digest)
+        revoke_jti(row.jti)
+        revoke_jti(row.refresh_jti)
+
+
+async def list_active_sessions(db: AsyncSession, user_id, limit: int, cursor: Optional[int] = None) -> List[Row]:
+
+    """
+    Lists a user's active, unexpired sessions newest first, with the device and IP of the
+    login that opened each one.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (uuid.UUID): The user whose sessions to list.
+        limit (int): Page size.
+        cursor (int, optional): Return sessions with an id lower than this (keyset pagination).
+
+    Returns:
+        List[Row]: Up to `limit` rows of (id, created_at, expires_at, token_digest, user_ip, user_device).
+    """
+
+    stmt = (
+        select(
+            AuthToken.id,
+            AuthToken.created_at,
+            AuthToken.expires_at,
+            AuthToken.token_digest,
+            AuthToken.user_ip,
+            AuthToken.user_device,
+        )
+        .where(
+            AuthToken.user_id == user_id,
+            AuthToken.status == TokenStatus.ACTIVE,
+            AuthToken.expires_at > func.now(),
+        )
+        .order_by(AuthToken.id.desc())
+        .limit(limit)
+    )
+    if cursor is not None:
+        stmt = stmt.where(AuthToken.id < cursor)
+
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def sweep_auth_tokens(engine: AsyncEngine) -> int:
+
+    """
+    Deletes expired and INACTIVE auth_tokens rows older than the retention window.
+
+    Rows are removed in batches of TOKEN_SWEEP_BATCH_SIZE, each in its own short transaction.
+    Candidate rows are claimed with FOR UPDATE SKIP LOCKED so the sweeper never waits on
+    rows a request is using, and concurrent sweepers in other workers never collide.
+
+    Args:
+        engine (AsyncEngine): The engine to run the sweep on.
+
+    Returns:
+        int: The number of rows removed.
+    """
+
+    batch_size = int(settings.TOKEN_SWEEP_BATCH_SIZE)
+    cutoff = func.now() - timedelta(days=int(settings.TOKEN_RETENTION_DAYS))
+
+    candidates = (
+        select(AuthToken.id)
+        .where(or_(
+            AuthToken.expires_at < cutoff,
+            and_(AuthToken.status == TokenStatus.INACTIVE, AuthToken.updated_at < cutoff),
+        ))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = delete(AuthToken).where(AuthToken.id.in_(candidates.scalar_subquery()))
+
+    started = time.perf_counter()
+    removed = 0
+
+    try:
+        while True:
+            async with engine.begin() as conn:
+                result = await conn.execute(stmt)
+            removed += max(result.rowcount, 0)
+
+            if result.rowcount < batch_size:
+                break
+
+            # Let request handlers run between batches
+            await asyncio.sleep(0)
+
+    except Exception:
+        sweeper_stats["errors"] += 1
+        raise
+
+    finally:
+        elapsed = time.perf_counter() - started
+        sweeper_stats["runs"] += 1
+        sweeper_stats["rows_removed_total"] += removed
+        sweeper_stats["last_run_rows_removed"] = removed
+        sweeper_stats["last_run_seconds"] = round(elapsed, 4)
+        sweeper_stats["last_run_at"] = datetime.now().isoformat()
+
+    logger.info(f"Token sweeper removed {removed} auth_tokens rows in {elapsed:.3f}s")
+    return removed
+
+
+async def run_token_sweeper(engine: AsyncEngine):
+
+    """
+    Runs sweep_auth_tokens every TOKEN_SWEEP_INTERVAL_SECONDS until cancelled.
+
+    Args:
+        engine (AsyncEngine): The engine to run the sweeps on.
+    """
+
+    interval = int(settings.TOKEN_SWEEP_INTERVAL_SECONDS)
+
+    while True:
+        try:
+            await sweep_auth_tokens(engine)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Token sweeper failed: {e}")
+
+        await asyncio.sleep(interval)
+
+
+async def load_revocations(engine: AsyncEngine):
+
+    """
+    Reloads the revocation list with the access and refresh jti of every row deactivated
+    recently enough for its access token to still be unexpired, and with the ids of the
+    users who are not ACTIVE.
+
+    Refresh tokens are never accepted without their ACTIVE row, so listing their jti for
+    one access token lifetime only shortcuts /auth/refresh for freshly revoked sessions.
+
+    Args:
+        engine (AsyncEngine): The engine to read from.
+    """
+
+    window = timedelta(seconds=ACCESS_TOKEN_LIFETIME_SECONDS)
+    tokens_stmt = select(AuthToken.jti, AuthToken.refresh_jti).where(
+        AuthToken.status == TokenStatus.INACTIVE,
+        AuthToken.updated_at > func.now() - window,
+    )
+    users_stmt = select(User.id).where(User.user_status != UserStatus.ACTIVE)
+
+    loaded_at = time.time()
+    async with engine.connect() as conn:
+        rows = (await conn.execute(tokens_stmt)).all()
+        inactive_users = (await conn.execute(users_stmt)).scalars().all()
+
+    # Upper bound: a token revoked now can live at most one more access token lifetime
+    expires_at = time.time() + ACCESS_TOKEN_LIFETIME_SECONDS
+    jtis = {jti for row in rows for jti in row if jti is not None}
+    revocation_list.replace(((jti, expires_at) for jti in jtis), inactive_users, loaded_at)
+
+
+def revoke_jti(jti: Optional[str]):
+
+    """
+    Adds a deactivated token's jti to this worker's revocation list right away.
+    """
+
+    revocation_list.revoke(jti, time.time() + ACCESS_TOKEN_LIFETIME_SECONDS)
+
+
+async def run_revocation_refresher(engine: AsyncEngine):
+
+    """
+    Runs load_revocations every REVOCATION_REFRESH_SECONDS until cancelled, so revocations
+    made by other workers reach this one.
+
+    Args:
+        engine (AsyncEngine): The engine to read from.
+    """
+
+    interval = int(settings.REVOCATION_REFRESH_SECONDS)
+
+    while True:
+        try:
+            await load_revocations(engine)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Revocation list refresh failed: {e}")
+
+        await asyncio.sleep(interval)
@@ -1,10 +1,15 @@
 from fastapi import FastAPI
 import os
+import time
+import asyncio
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import RedirectResponse, JSONResponse
 from app.core.config import get_settings, get_logger
-from app.db.session import init_db, drop_db, Add_Ibotix_Admin
+from app.db.session import init_db, drop_db, engine, READ_PRIMARY_COOKIE
+from app.db.token_store import run_token_sweeper, run_revocation_refresher, STATELESS_ACCESS_TOKENS
+from app.db.auth_log_writer import auth_log_writer
+from app.db.change_feed import change_listener
 from app.db.models import *
 from app.routes.auth import router as auth_router
 from app.routes.refresh import router as refresh_router
@@ -12,10 +17,15 @@ from app.routes.services import router as services_router
 from app.routes.portfolio import router as portfolio_router
 from app.routes.hero_section import router as hero_router
 from app.routes.contact import router as contact_router
+from app.routes.metrics import router as metrics_router
+from app.routes.search import router as search_router
+from app.routes.suggest import router as suggest_router
+from app.routes.suggest.suggest import load_suggest_index
 from app.utility.CustomException import CustomHttpException
+from app.utility.read_your_writes import ReadYourWritesMiddleware
 from starlette.status import HTTP_301_MOVED_PERMANENTLY
 from fastapi.requests import Request
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 # Import Logger and Environment Variables
 logger = get_logger()
@@ -54,21 +64,50 @@ async def lifespan(app: FastAPI):
         None
     """
     
-    # Startup event: Initialize database
+    # Startup event: Initialize database (fast path when the schema is current)
     logger.info("Starting up: Initializing the database")
+    boot_started = time.perf_counter()
     await init_db()
-    await Add_Ibotix_Admin()
+    logger.info(f"Database ready in {time.perf_counter() - boot_started:.3f}s")
 
     # Create static folder if not exists
     if not os.path.exists("static"):
         os.makedirs("static")
 
+    # Listen for content changes made by other workers, then build the in-process suggestion index
+    if settings.CHANGE_FEED_ENABLED:
+        await change_listener.start()
+    await load_suggest_index()
+
+    # Start the batched AuthLog writer
+    await auth_log_writer.start()
+
+    # Start the expired/inactive token sweeper
+    sweeper_task = None
+    if int(settings.TOKEN_SWEEP_INTERVAL_SECONDS) > 0:
+        sweeper_task = asyncio.create_task(run_token_sweeper(engine))
+
+    # Keep the stateless-mode revocation list in sync with the database
+    revocation_task = None
+    if STATELESS_ACCESS_TOKENS:
+        revocation_task = asyncio.create_task(run_revocation_refresher(engine))
+
     # Yield to let the application run
     yield
 
     # Shutdown event: Perform any cleanup tasks
-    logger.info("Shutting down: Cleaning up resources & Dropping DB")
-    await drop_db()
+    logger.info("Shutting down: Cleaning up resources")
+    for task in (sweeper_task, revocation_task):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await auth_log_writer.stop()
+    await change_listener.stop()
+
+    if settings.DROP_DB_ON_SHUTDOWN:
+        logger.info("Shutting down: Dropping DB")
+        await drop_db()
 
 # Initialize FastAPI with the lifespan manager
 app = FastAPI(lifespan=lifespan)
@@ -80,8 +119,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Read-your-writes: pin a client's reads to the primary for a short while after it writes
+if settings.READ_DATABASE_URL:
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        cookie_name=READ_PRIMARY_COOKIE,
+        max_age=int(settings.READ_YOUR_WRITES_SECONDS),
+    )
+
 # Mount Static Files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -93,6 +141,9 @@ app.include_router(services_router, prefix="/api/services", tags=["Services"])
 app.include_router(portfolio_router, prefix="/api/portfolio", tags=["Portfolio"])
 app.include_router(hero_router, prefix="/api/hero", tags=["Hero Section"])
 app.include_router(contact_router, prefix="/api/contact", tags=["Contact Us"])
+app.include_router(search_router, prefix="/api/search", tags=["Search"])
+app.include_router(suggest_router, prefix="/api/suggest", tags=["Search"])
+app.include_router(metrics_router, prefix="/api/metrics", tags=["Metrics"])
 
 
 # Custom Exception Handler
@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Query
 from fastapi.security import OAuth2PasswordBearer,OAuth2PasswordRequestForm
 from app.db.schema import (LoginResponse, BaseOutput, AdminRegistration, BrokerRegistration, 
-                           BrokerAliasRegistration, AgentRegistration)
+                           BrokerAliasRegistration, AgentRegistration, SessionRead, SessionList)
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 from random import randint
+import time
 from app.db.session import get_session
+from app.db.token_store import (access_token_column, token_key, new_auth_token, revoke_tokens, forget_revoked,
+                                notify_sessions_changed, list_active_sessions, STATELESS_ACCESS_TOKENS)
+from app.db.auth_log_writer import auth_log_writer
 from app.db.models import *
 from app.db.enum import TokenStatus, AuthEvent, UserStatus, UserType
-from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND, HTTP_200_OK
+from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND, HTTP_200_OK, HTTP_429_TOO_MANY_REQUESTS
 from datetime import timedelta
-from sqlalchemy import select, and_, func
-from typing import Annotated
-from app.utility.misc import (decode_token, verify_password, create_access_token, 
-                              create_refresh_token, get_password_hash)
+from sqlalchemy import select, and_, func, bindparam
+from typing import Annotated, Optional
+from app.utility.misc import (decode_token, verify_password_async, create_access_token, 
+                              create_refresh_token, get_password_hash_async, user_claims, hash_token,
+                              ACCESS_TOKEN_TYPE)
 from app.core.config import get_settings,get_logger
 from app.utility.CustomException import CustomHttpException
+from app.utility.token_cache import token_cache, UserSnapshot
+from app.utility.revocation import revocation_list
+from app.utility.rate_limit import SlidingWindowLimiter, retry_after_header
+from app.utility.client_ip import client_ip
 
 # Load Env and Logger
 settings=get_settings()
@@ -26,7 +35,35 @@ logger = get_logger()
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-async def get_active_user(token:str = Depends(oauth2_scheme),db: AsyncSession = Depends(get_session))-> User:
+# Login throttling, checked before any DB query or bcrypt work
+login_ip_limiter = SlidingWindowLimiter(
+    max_attempts=int(settings.LOGIN_MAX_ATTEMPTS_PER_IP),
+    window=float(settings.LOGIN_RATE_WINDOW_SECONDS),
+    max_keys=int(settings.LOGIN_RATE_MAX_KEYS),
+)
+login_user_limiter = SlidingWindowLimiter(
+    max_attempts=int(settings.LOGIN_MAX_ATTEMPTS_PER_USER),
+    window=float(settings.LOGIN_RATE_WINDOW_SECONDS),
+    max_keys=int(settings.LOGIN_RATE_MAX_KEYS),
+)
+
+# Resolves the user, token status and token expiry in a single round trip.
+# Built once with bind parameters so the compiled SQL and asyncpg's prepared
+# statement are reused across requests.
+active_user_stmt = (
+    select(User)
+    .join(AuthToken, AuthToken.user_id == User.id)
+    .where(
+        User.email == bindparam("email"),
+        User.user_status == UserStatus.ACTIVE,
+        access_token_column == bindparam("token"),
+        AuthToken.status == TokenStatus.ACTIVE,
+        AuthToken.expires_at > func.now(),
+    )
+    .limit(1)
+)
+
+async def get_active_user(token:str = Depends(oauth2_scheme),db: AsyncSession = Depends(get_session))-> UserSnapshot:
     
     """
     Retrieves the current user based on the provided token and database session.
@@ -36,7 +73,7 @@ async def get_active_user(token:str = Depends(oauth2_scheme),db: AsyncSession =
         db (AsyncSession): The database session to query the user data. Defaults to Depends(get_session).
 
     Returns:
-        User
+        UserSnapshot: A detached snapshot of the authenticated user.
     """
     
     credentials_exception = CustomHttpException(
@@ -46,6 +83,14 @@ async def get_active_user(token:str = Depends(oauth2_scheme),db: AsyncSession =
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    started = time.perf_counter()
+    
+    # Verified-token cache hit: skip both DB lookups
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        token_cache.latency["cache"].record(time.perf_counter() - started)
+        return cached_user
+    
     try:
 
         payload = decode_token(token, token_type="access")
@@ -55,21 +100,29 @@ async def get_active_user(token:str = Depends(oauth2_scheme),db: AsyncSession =
             logger.error("Error in get_active_user: Username null in token payload")
             raise credentials_exception
             
-        else:
-            stmt = select(User).where(User.email == username, User.user_status == UserStatus.ACTIVE)
-            user = await db.execute(stmt)
-            user = user.scalars().first()
-            auth_token = await db.execute(select(AuthToken).where(AuthToken.token == token).where(AuthToken.status == TokenStatus.ACTIVE and AuthToken.expires_at > datetime.now()))
-            auth_token = auth_token.scalars().first()
-            
-            if not auth_token:
-                logger.error("Error in get_active_user: Token record not found or inactive/expired in DB")
+        # Stateless mode: authorize from the claims and the revocation list alone
+        elif (STATELESS_ACCESS_TOKENS and payload.get("typ") == ACCESS_TOKEN_TYPE
+              and all(payload.get(claim) for claim in ("uid", "user_type", "jti"))):
+            if revocation_list.is_revoked(payload["jti"]):
+                logger.error(f"Error in get_active_user: Token {payload['jti']} has been revoked")
                 raise credentials_exception
+            if revocation_list.is_user_revoked(payload["uid"]):
+                logger.error(f"Error in get_active_user: User {payload['uid']} is not active")
+                raise credentials_exception
+            token_cache.latency["stateless"].record(time.perf_counter() - started)
+            return UserSnapshot.from_claims(payload)
             
+        else:
+            user = await db.execute(active_user_stmt, {"email": username, "token": token_key(token)})
+            user = user.scalars().first()
 
             if user is None:
-                logger.error(f"Error in get_active_user: User not found for email {username}")
+                logger.error(f"Error in get_active_user: No active user/token pair for email {username} (token inactive, expired or unknown)")
                 raise credentials_exception
+            
+            user = UserSnapshot.from_user(user)
+            token_cache.set(token, user, token_exp=payload.get("exp"))
+            token_cache.latency["database"].record(time.perf_counter() - started)
             return user
         
     except Exception as e:
@@ -80,6 +133,7 @@ async def get_active_user(token:str = Depends(oauth2_scheme),db: AsyncSession =
             logger.error(f"Error in get_active_user: {str(e)}")
             raise credentials_exception
 
+
 # Endpoint for Login
 @router.post("/login", responses={200: {"model": LoginResponse}})
 async def login(
@@ -100,9 +154,19 @@ async def login(
         LoginResponse: A response message indicating the status of the login.
 
     Raises:
-        CustomHttpException: If the user is unauthorized or if an internal server error occurs.
+        CustomHttpException: If the user is unauthorized, throttled or if an internal server error occurs.
     """
     
+    # Throttle per client IP and per account before touching the DB or bcrypt
+    retry_after = login_ip_limiter.hit(client_ip(request)) or login_user_limiter.hit(data.username.lower())
+    if retry_after:
+        raise CustomHttpException(
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            message="Login Unsuccessful",
+            headers=retry_after_header(retry_after),
+        )
+    
     try:
         username = data.username
         password = data.password
@@ -111,7 +175,7 @@ async def login(
         )
         user = user.scalars().first()
 
-        if not user or not verify_password(password, user.password):
+        if not user or not await verify_password_async(password, user.password):
             raise CustomHttpException(
                 status_code=HTTP_401_UNAUTHORIZED, 
                 detail="Invalid Email or Password", 
@@ -126,29 +190,29 @@ async def login(
         #        message="Login Unsuccessful"
         #    )
 
-        token = create_access_token(data={"sub": user.email})
-        refresh_token = create_refresh_token(data={"sub": user.email})
+        login_user_limiter.reset(username.lower())
+
+        claims = user_claims(user)
+        token = create_access_token(data=claims)
+        refresh_token = create_refresh_token(data=claims)
 
-        auth_token = AuthToken(
+        auth_token = new_auth_token(
             user_id=user.id, 
             token=token, 
             refresh_token=refresh_token,
-            status=TokenStatus.ACTIVE,
-            expires_at=func.now() + timedelta(days=30)
+            expires_at=func.now() + timedelta(days=30),
+            user_ip=client_ip(request),
+            user_device=request.headers.get('User-Agent'),
         )
         db.add(auth_token)
         await db.commit()
         
-        if auth_token:
-            
-            auth_log = AuthLog(user_id=user.id, 
-                               event=AuthEvent.LOGIN, 
-                               timestamp=func.now(),
-                               user_ip=request.client.host,
-                               user_device=request.headers.get('User-Agent')
-                               )
-            db.add(auth_log)
-            await db.commit()
+        # Auth Log (written in the background)
+        auth_log_writer.log(user_id=user.id, 
+                            event=AuthEvent.LOGIN, 
+                            user_ip=client_ip(request),
+                            user_device=request.headers.get('User-Agent')
+                            )
 
         response = JSONResponse(
             content={
@@ -172,6 +236,8 @@ async def login(
         return response
 
     except Exception as e:
+        if isinstance(e, CustomHttpException):
+            raise e
         logger.error(str(e))
         raise CustomHttpException(status_code=500, detail="Internal Server Error", message="Error logging user")
 
@@ -222,7 +288,7 @@ async def register_admin(
             user_type=UserType.ADMIN,
             name=payload.name,
             email=payload.email,
-            password=get_password_hash(payload.password),  # Securely hash the password
+            password=await get_password_hash_async(payload.password),  # Securely hash the password
             user_status=UserStatus.ACTIVE,
         )
             
@@ -234,17 +300,12 @@ async def register_admin(
         db.add(admin_profile)
         await db.commit()
         
-        # Auth Log
-        if admin_user:
-                
-                auth_log = AuthLog(user_id=admin_user.id, 
-                                event=AuthEvent.REGISTER, 
-                                timestamp=func.now(),
-                                user_ip=request.client.host,
-                                user_device=request.headers.get('User-Agent')
-                                )
-                db.add(auth_log)
-                await db.commit()
+        # Auth Log (written in the background)
+        auth_log_writer.log(user_id=admin_user.id, 
+                            event=AuthEvent.REGISTER, 
+                            user_ip=client_ip(request),
+                            user_device=request.headers.get('User-Agent')
+                            )
         
         response = JSONResponse(
             content={
@@ -257,10 +318,159 @@ async def register_admin(
         return response
         
     except Exception as e:
+        if isinstance(e, CustomHttpException):
+            raise e
         logger.error(str(e))
         raise CustomHttpException(status_code=500, detail="Internal Server Error", message="Error logging user")
 
 
+# Endpoint for Logout (current session)
+@router.post("/logout", responses = {200: {"model": BaseOutput}})
+async def logout(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    user: User = Depends(get_active_user),
+    db: AsyncSession = Depends(get_session),
+):
+    
+    """
+    Revokes the session the request was made with.
+
+    Args:
+        request (Request): The incoming request.
+        token (str): The access token of the session.
+        user (User): The user object obtained from the token.
+        db (AsyncSession): The database session.
+
+    Returns:
+        BaseOutput: A response message indicating the session was revoked.
+    """
+    
+    try:
+        revoked = await revoke_tokens(db, access_token_column == token_key(token))
+        await notify_sessions_changed(db, [user.id])
+        await db.commit()
+        forget_revoked(revoked)
+        
+        # Auth Log (written in the background)
+        auth_log_writer.log(user_id=user.id, 
+                            event=AuthEvent.LOGOUT, 
+                            user_ip=client_ip(request),
+                            user_device=request.headers.get('User-Agent')
+                            )
+        
+        response = JSONResponse(
+            content={
+                "message" : "Logout Successful",
+                "detail" : "Session has been revoked"
+            },
+            status_code=HTTP_200_OK
+        )
+        response.delete_cookie(key="Access_token")
+        response.delete_cookie(key="Refresh_token")
+        
+        return response
+        
+    except Exception as e:
+        logger.error(str(e))
+        raise CustomHttpException(status_code=500, detail="Internal Server Error", message="Error logging out user")
+
+
+# Endpoint for Logout (all sessions)
+@router.post("/logout-all", responses = {200: {"model": BaseOutput}})
+async def logout_all(
+    request: Request,
+    user: User = Depends(get_active_user),
+    db: AsyncSession = Depends(get_session),
+):
+    
+    """
+    Revokes every active session of the current user with a single UPDATE.
+
+    Args:
+        request (Request): The incoming request.
+        user (User): The user object obtained from the token.
+        db (AsyncSession): The database session.
+
+    Returns:
+        BaseOutput: A response message with the number of revoked sessions.
+    """
+    
+    try:
+        revoked = await revoke_tokens(db, AuthToken.user_id == user.id)
+        await notify_sessions_changed(db, [user.id])
+        await db.commit()
+        forget_revoked(revoked)
+        token_cache.invalidate_user(user.id)
+        
+        # Auth Log (written in the background)
+        auth_log_writer.log(user_id=user.id, 
+                            event=AuthEvent.LOGOUT, 
+                            user_ip=client_ip(request),
+                            user_device=request.headers.get('User-Agent')
+                            )
+        
+        response = JSONResponse(
+            content={
+                "message" : "Logout Successful",
+                "detail" : f"{len(revoked)} session(s) have been revoked"
+            },
+            status_code=HTTP_200_OK
+        )
+        response.delete_cookie(key="Access_token")
+        response.delete_cookie(key="Refresh_token")
+        
+        return response
+        
+    except Exception as e:
+        logger.error(str(e))
+        raise CustomHttpException(status_code=500, detail="Internal Server Error", message="Error logging out user")
+
+
+# Endpoint for listing the current user's active sessions
+@router.get("/sessions", response_model=SessionList)
+async def get_active_sessions(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = Query(None),
+    token: str = Depends(oauth2_scheme),
+    user: User = Depends(get_active_user),
+    db: AsyncSession = Depends(get_session),
+):
+    
+    """
+    Lists the current user's active sessions, newest first, with the IP and device of the
+    login that opened each one.
+
+    Args:
+        limit (int): Page size.
+        cursor (int, optional): `next_cursor` of the previous page.
+        token (str): The access token of the current session.
+        user (User): The user object obtained from the token.
+        db (AsyncSession): The database session.
+
+    Returns:
+        SessionList: One page of sessions and the cursor of the next page.
+    """
+    
+    rows = await list_active_sessions(db, user.id, limit=limit + 1, cursor=cursor)
+    current_digest = hash_token(token)
+    
+    sessions = [
+        SessionRead(
+            id=row.id,
+            created_at=row.created_at,
+            expires_at=row.expires_at,
+            user_ip=row.user_ip,
+            user_device=row.user_device,
+            current=row.token_digest == current_digest,
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = sessions[-1].id if len(rows) > limit else None
+    
+    return SessionList(sessions=sessions, next_cursor=next_cursor)
+
+
 # # Endpoint for Broker Registration
 # @router.post("/register_broker", responses = {200: {"model": BaseOutput}})
 # async def register_broker(
@@ -1,20 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List, Optional
 import uuid
-import shutil
-import os
 
-from app.db.session import get_session
+from app.core.config import get_settings
+from app.db.session import get_session, get_read_session_factory, ReadSessionFactory
+from app.db.change_feed import notify_change, change_listener
+from app.db.content_store import bulk_create, bulk_update, bulk_delete, parse_bulk_items, HERO_CONTENT
 from app.db.models import HeroSection, User
-from app.db.schema import HeroResponse, BaseOutput
+from app.db.schema import HeroResponse, BaseOutput, BulkResult, BulkDelete
 from app.routes.auth import get_active_user
+from app.utility.uploads import save_upload, remove_upload
 from app.db.enum import UserType
+from app.utility.pagination import keyset_page, next_cursor, PAGE_MAX_LIMIT, NEXT_CURSOR_HEADER
+from app.utility.projection import serialize_listing
+from app.utility.content_cache import content_cache, CachedListing
 
-router = APIRouter()
+# Loading Settings
+settings = get_settings()
 
-STATIC_DIR = "static"
+router = APIRouter()
 
 async def check_admin(user: User = Depends(get_active_user)):
     if user.user_type != UserType.ADMIN:
@@ -26,11 +32,107 @@ async def check_admin(user: User = Depends(get_active_user)):
 
 @router.get("", response_model=List[HeroResponse])
 async def get_hero_sections(
-    db: AsyncSession = Depends(get_session)
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    read_session: ReadSessionFactory = Depends(get_read_session_factory)
 ):
-    result = await db.execute(select(HeroSection))
-    hero_sections = result.scalars().all()
-    return hero_sections
+    
+    """
+    Lists hero sections in a stable (created_at, id) order.
+
+    Without `limit` every row is returned, as before. With `limit` one page is
+    returned and the cursor of the next page is sent in the X-Next-Cursor header
+    (absent on the last page). Responses are served from the content cache
+    and carry an ETag; a matching If-None-Match gets a 304.
+
+    Args:
+        request (Request): The incoming request (for If-None-Match).
+        limit (int, optional): Page size.
+        cursor (str, optional): X-Next-Cursor of the previous page.
+        read_session (ReadSessionFactory): Opens the read-only database session on a cache miss.
+
+    Returns:
+        List: The hero sections.
+    """
+    
+    async def load(db: AsyncSession) -> CachedListing:
+        result = await db.execute(keyset_page(select(HeroSection), HeroSection, limit, cursor))
+        rows = list(result.scalars().all())
+
+        next_page = next_cursor(rows, limit)
+        headers = {NEXT_CURSOR_HEADER: next_page} if next_page is not None else {}
+        return CachedListing(body=serialize_listing(HeroResponse, None, rows), headers=headers)
+
+    return await content_cache.respond(request, read_session, HeroSection.__tablename__, HeroResponse, (limit, cursor), load,
+                                       settings.HERO_CACHE_CONTROL)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_hero_sections(
+    items: str = Form(...),
+    files: List[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Creates many hero sections in one transaction.
+
+    Args:
+        items (str): JSON array of hero sections; image fields name one of the uploaded `files`.
+        files (List[UploadFile], optional): The images referenced by the items.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+    
+    return await bulk_create(db, HERO_CONTENT, parse_bulk_items(items), files)
+
+@router.put("/bulk", response_model=BulkResult)
+async def bulk_update_hero_sections(
+    items: str = Form(...),
+    files: List[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Updates many hero sections in one transaction. Fields left out keep their value.
+
+    Args:
+        items (str): JSON array of changes, each with the `id` of the hero section to update.
+        files (List[UploadFile], optional): The images referenced by the items.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+    
+    return await bulk_update(db, HERO_CONTENT, parse_bulk_items(items), files)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_hero_sections(
+    payload: BulkDelete,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Deletes many hero sections (and their images) in one transaction.
+
+    Args:
+        payload (BulkDelete): The ids to delete.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every id, in request order.
+    """
+    
+    return await bulk_delete(db, HERO_CONTENT, payload.ids)
 
 @router.post("", response_model=HeroResponse)
 async def create_hero_section(
@@ -42,14 +144,7 @@ async def create_hero_section(
 ):
     # Save Image
     try:
-        file_extension = image.filename.split(".")[-1]
-        file_name = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(STATIC_DIR, file_name)
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
-        image_url = f"/static/{file_name}"
+        image_url = save_upload(image)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
@@ -61,7 +156,11 @@ async def create_hero_section(
         image=image_url
     )
     db.add(new_hero)
+    await db.flush()
+    version = await notify_change(db, HeroSection.__tablename__, "create", [new_hero.id])
     await db.commit()
+    change_listener.observe(HeroSection.__tablename__, version)
+    content_cache.invalidate(HeroSection.__tablename__)
     await db.refresh(new_hero)
     return new_hero
 
@@ -88,19 +187,15 @@ async def update_hero_section(
     # Handle Image Update
     if image:
         try:
-            file_extension = image.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(STATIC_DIR, file_name)
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            
-            hero.image = f"/static/{file_name}"
+            hero.image = save_upload(image)
         
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
     
+    version = await notify_change(db, HeroSection.__tablename__, "update", [hero.id])
     await db.commit()
+    change_listener.observe(HeroSection.__tablename__, version)
+    content_cache.invalidate(HeroSection.__tablename__)
     await db.refresh(hero)
     return hero
 
@@ -116,19 +211,11 @@ async def delete_hero_section(
         raise HTTPException(status_code=404, detail="Hero Section not found")
     
     # Delete Image from Static Folder
-    if hero.image:
-        # Assuming hero.image is stored as relative path e.g., /static/filename.ext
-        # We need to construct the full local path
-        # Remove leading slash if present
-        relative_path = hero.image.lstrip("/")
-        file_path = relative_path  # Since STATIC_DIR is "static" and relative_path starts with "static/"
-        
-        # If the structure is different, we might need adjustments. 
-        # Based on creation: image_url = f"/static/{file_name}" -> "static/filename.ext" matches default current dir structure if running from root.
-        
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    remove_upload(hero.image)
 
     await db.delete(hero)
+    version = await notify_change(db, HeroSection.__tablename__, "delete", [id])
     await db.commit()
+    change_listener.observe(HeroSection.__tablename__, version)
+    content_cache.invalidate(HeroSection.__tablename__)
     return BaseOutput(message="Hero Section deleted successfully", detail=f"Hero Section with id {id} has been deleted")
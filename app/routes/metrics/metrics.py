@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.db.models import User
+from app.db.session import engine, read_engine, pool_stats
+from app.routes.auth import get_active_user, login_ip_limiter, login_user_limiter
+from app.db.enum import UserType
+from app.utility.token_cache import token_cache
+from app.db.token_store import sweeper_stats
+from app.db.auth_log_writer import auth_log_writer
+from app.db.change_feed import change_listener
+from app.utility.revocation import revocation_list
+from app.utility.prefix_index import suggest_index
+from app.utility.content_cache import content_cache
+
+router = APIRouter()
+
+async def check_admin(user: User = Depends(get_active_user)):
+    if user.user_type != UserType.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can perform this action"
+        )
+    return user
+
+@router.get("/token-cache")
+async def get_token_cache_stats(
+    user: User = Depends(check_admin)
+):
+    return token_cache.stats()
+
+@router.get("/token-sweeper")
+async def get_token_sweeper_stats(
+    user: User = Depends(check_admin)
+):
+    return sweeper_stats
+
+@router.get("/auth-log-writer")
+async def get_auth_log_writer_stats(
+    user: User = Depends(check_admin)
+):
+    return auth_log_writer.stats
+
+@router.get("/revocation-list")
+async def get_revocation_list_stats(
+    user: User = Depends(check_admin)
+):
+    return revocation_list.stats()
+
+@router.get("/login-throttle")
+async def get_login_throttle_stats(
+    user: User = Depends(check_admin)
+):
+    return {
+        "per_ip": login_ip_limiter.stats(),
+        "per_user": login_user_limiter.stats(),
+    }
+
+@router.get("/pool")
+async def get_pool_stats(
+    user: User = Depends(check_admin)
+):
+    return {
+        "primary": pool_stats(engine),
+        "replica": pool_stats(read_engine) if read_engine is not None else None,
+    }
+
+@router.get("/suggest-index")
+async def get_suggest_index_stats(
+    user: User = Depends(check_admin)
+):
+    return suggest_index.stats()
+
+@router.get("/change-feed")
+async def get_change_feed_stats(
+    user: User = Depends(check_admin)
+):
+    return change_listener.stats
+
+@router.get("/content-cache")
+async def get_content_cache_stats(
+    user: User = Depends(check_admin)
+):
+    return content_cache.stats()
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List, Optional
 import uuid
-import shutil
 import os
 
-from app.db.session import get_session
+from app.core.config import get_settings
+from app.db.session import get_session, get_read_session_factory, ReadSessionFactory
+from app.db.change_feed import notify_change, change_listener
+from app.db.content_store import bulk_create, bulk_update, bulk_delete, parse_bulk_items, PORTFOLIO_CONTENT
 from app.db.models import Portfolio, User
-from app.db.schema import PortfolioResponse, BaseOutput
+from app.db.schema import PortfolioResponse, BaseOutput, BulkResult, BulkDelete
 from app.routes.auth import get_active_user
-from app.db.enum import UserType
+from app.utility.uploads import save_upload
+from app.db.enum import UserType, ContentType
+from app.utility.pagination import keyset_page, next_cursor, PAGE_MAX_LIMIT, NEXT_CURSOR_HEADER
+from app.utility.projection import parse_fields, projection_columns, serialize_listing
+from app.utility.content_cache import content_cache, CachedListing
+from app.utility.prefix_index import suggest_index
 
-router = APIRouter()
+# Loading Settings
+settings = get_settings()
 
-STATIC_DIR = "static"
+router = APIRouter()
 
 async def check_admin(user: User = Depends(get_active_user)):
     if user.user_type != UserType.ADMIN:
@@ -26,11 +34,118 @@ async def check_admin(user: User = Depends(get_active_user)):
 
 @router.get("", response_model=List[PortfolioResponse])
 async def get_all_portfolios(
-    db: AsyncSession = Depends(get_session)
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    read_session: ReadSessionFactory = Depends(get_read_session_factory)
+):
+    
+    """
+    Lists portfolio items in a stable (created_at, id) order.
+
+    Without `limit` every row is returned, as before. With `limit` one page is
+    returned and the cursor of the next page is sent in the X-Next-Cursor header
+    (absent on the last page). With `fields` (comma-separated) only those columns
+    are selected and returned. Responses are served from the content cache
+    and carry an ETag; a matching If-None-Match gets a 304.
+
+    Args:
+        request (Request): The incoming request (for If-None-Match).
+        limit (int, optional): Page size.
+        cursor (str, optional): X-Next-Cursor of the previous page.
+        category (str, optional): Only return items in this category.
+        fields (str, optional): Subset of response fields to return.
+        read_session (ReadSessionFactory): Opens the read-only database session on a cache miss.
+
+    Returns:
+        List: The portfolio items.
+    """
+    
+    projection = parse_fields(fields, PortfolioResponse)
+
+    async def load(db: AsyncSession) -> CachedListing:
+        stmt = select(*projection_columns(Portfolio, projection)) if projection else select(Portfolio)
+        if category is not None:
+            stmt = stmt.where(Portfolio.category == category)
+
+        result = await db.execute(keyset_page(stmt, Portfolio, limit, cursor))
+        rows = list(result.all() if projection else result.scalars().all())
+
+        next_page = next_cursor(rows, limit)
+        headers = {NEXT_CURSOR_HEADER: next_page} if next_page is not None else {}
+        return CachedListing(body=serialize_listing(PortfolioResponse, projection, rows), headers=headers)
+
+    return await content_cache.respond(request, read_session, Portfolio.__tablename__, PortfolioResponse, (limit, cursor, category, projection), load,
+                                       settings.PORTFOLIO_CACHE_CONTROL)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_portfolios(
+    items: str = Form(...),
+    files: List[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
 ):
-    result = await db.execute(select(Portfolio))
-    portfolios = result.scalars().all()
-    return portfolios
+    
+    """
+    Creates many portfolio items in one transaction.
+
+    Args:
+        items (str): JSON array of portfolio items; image fields name one of the uploaded `files`.
+        files (List[UploadFile], optional): The images referenced by the items.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+    
+    return await bulk_create(db, PORTFOLIO_CONTENT, parse_bulk_items(items), files)
+
+@router.put("/bulk", response_model=BulkResult)
+async def bulk_update_portfolios(
+    items: str = Form(...),
+    files: List[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Updates many portfolio items in one transaction. Fields left out keep their value.
+
+    Args:
+        items (str): JSON array of changes, each with the `id` of the portfolio item to update.
+        files (List[UploadFile], optional): The images referenced by the items.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+    
+    return await bulk_update(db, PORTFOLIO_CONTENT, parse_bulk_items(items), files)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_portfolios(
+    payload: BulkDelete,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Deletes many portfolio items (and their images) in one transaction.
+
+    Args:
+        payload (BulkDelete): The ids to delete.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every id, in request order.
+    """
+    
+    return await bulk_delete(db, PORTFOLIO_CONTENT, payload.ids)
 
 @router.get("/{id}", response_model=PortfolioResponse)
 async def get_portfolio(
@@ -55,14 +170,7 @@ async def create_portfolio(
 ):
     # Save Image
     try:
-        file_extension = image.filename.split(".")[-1]
-        file_name = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(STATIC_DIR, file_name)
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
-        image_url = f"/static/{file_name}"
+        image_url = save_upload(image)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
@@ -75,8 +183,13 @@ async def create_portfolio(
         image=image_url
     )
     db.add(new_portfolio)
+    await db.flush()
+    version = await notify_change(db, Portfolio.__tablename__, "create", [new_portfolio.id])
     await db.commit()
+    change_listener.observe(Portfolio.__tablename__, version)
+    content_cache.invalidate(Portfolio.__tablename__)
     await db.refresh(new_portfolio)
+    suggest_index.add(ContentType.PORTFOLIO, new_portfolio.id, new_portfolio.title, new_portfolio.category)
     return new_portfolio
 
 @router.put("/{id}", response_model=PortfolioResponse)
@@ -107,20 +220,17 @@ async def update_portfolio(
         try:
             # Delete old image if exists? (Optional improvement)
             
-            file_extension = image.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(STATIC_DIR, file_name)
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            
-            portfolio.image = f"/static/{file_name}"
+            portfolio.image = save_upload(image)
         
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
     
+    version = await notify_change(db, Portfolio.__tablename__, "update", [portfolio.id])
     await db.commit()
+    change_listener.observe(Portfolio.__tablename__, version)
+    content_cache.invalidate(Portfolio.__tablename__)
     await db.refresh(portfolio)
+    suggest_index.add(ContentType.PORTFOLIO, portfolio.id, portfolio.title, portfolio.category)
     return portfolio
 
 @router.delete("/{id}", response_model=BaseOutput)
@@ -137,5 +247,9 @@ async def delete_portfolio(
     # Optionally delete the image file here
     
     await db.delete(portfolio)
+    version = await notify_change(db, Portfolio.__tablename__, "delete", [id])
     await db.commit()
+    change_listener.observe(Portfolio.__tablename__, version)
+    content_cache.invalidate(Portfolio.__tablename__)
+    suggest_index.remove(id)
     return BaseOutput(message="Portfolio Item deleted successfully", detail=f"Portfolio Item with id {id} has been deleted")
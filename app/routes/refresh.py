@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_session
+from app.db.token_store import rotate_refresh_token, revoke_jti, notify_sessions_changed
 from app.db.schema import RefreshTokenRequest, RefreshTokenResponse
-from app.utility.misc import decode_token, create_access_token, create_refresh_token
-from app.db.models import AuthToken
-from app.db.enum import TokenStatus
+from app.db.models import User
+from app.db.enum import UserStatus
+from app.utility.misc import decode_token, create_access_token, create_refresh_token, user_claims
 from sqlalchemy import select, func
-from datetime import datetime
 from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
 from app.utility.CustomException import CustomHttpException
+from app.utility.token_cache import token_cache
+from app.utility.revocation import revocation_list
 from app.core.config import get_settings, get_logger
 from datetime import timedelta
 
@@ -23,7 +25,8 @@ async def refresh_token(
 ):
     """
     Refresh access token using a valid refresh token.
-    Invalidates the old refresh token and issues a new pair.
+    Invalidates the old refresh token and issues a new pair. The claims of the new
+    access token are read from the user row, so only ACTIVE users can refresh.
     """
     
     credentials_exception = CustomHttpException(
@@ -37,46 +40,39 @@ async def refresh_token(
         # Decode the refresh token
         payload = decode_token(request.refresh_token, token_type="refresh")
         email: str = payload.get("sub")
-        if not email:
+        if not email or revocation_list.is_revoked(payload.get("jti")):
             raise credentials_exception
 
-        # Check if the refresh token exists in the database and is active
-        stmt = select(AuthToken).where(
-            AuthToken.refresh_token == request.refresh_token,
-            AuthToken.status == TokenStatus.ACTIVE
-        )
-        result = await db.execute(stmt)
-        auth_token_record = result.scalars().first()
-
-        if not auth_token_record:
+        user = await db.execute(select(User).where(User.email == email, User.user_status == UserStatus.ACTIVE))
+        user = user.scalars().first()
+        if user is None:
             raise credentials_exception
 
-        # Check if the token is expired (DB check)
-        if auth_token_record.expires_at < datetime.now():
-            auth_token_record.status = TokenStatus.INACTIVE
-            await db.commit()
-            raise credentials_exception
+        # Generate new tokens carrying the user's current identity claims
+        claims = user_claims(user)
+        new_access_token = create_access_token(data=claims)
+        new_refresh_token = create_refresh_token(data=claims)
 
-        # Invalidate the old refresh token
-        auth_token_record.status = TokenStatus.INACTIVE
-        db.add(auth_token_record)
-        
-        # Generate new tokens
-        new_access_token = create_access_token(data={"sub": email})
-        new_refresh_token = create_refresh_token(data={"sub": email})
-        
-        # Create new AuthToken record
-        new_auth_token_record = AuthToken(
-            user_id=auth_token_record.user_id,
+        # Deactivate the old pair and insert the new one in a single statement;
+        # no row back means the refresh token is unknown, inactive, expired or already rotated
+        rotated = await rotate_refresh_token(
+            db,
+            refresh_token=request.refresh_token,
             token=new_access_token,
-            refresh_token=new_refresh_token,
-            status=TokenStatus.ACTIVE,
-            expires_at=datetime.now() + timedelta(days=30)
+            new_refresh_token=new_refresh_token,
+            expires_at=func.now() + timedelta(days=30)
         )
-        
-        db.add(new_auth_token_record)
+        if not rotated or rotated.user_id != user.id:
+            await db.rollback()
+            raise credentials_exception
+
+        await notify_sessions_changed(db, [user.id])
         await db.commit()
-        await db.refresh(new_auth_token_record)
+
+        # Drop the old pair from the verified-token cache and revoke it for stateless mode
+        token_cache.invalidate_digest(rotated.token_digest)
+        revoke_jti(rotated.jti)
+        revoke_jti(rotated.refresh_jti)
 
         return RefreshTokenResponse(
             access_token=new_access_token,
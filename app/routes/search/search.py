@@ -0,0 +1,153 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal, union_all
+from typing import Optional
+
+from app.db.session import get_read_session
+from app.db.models import Service, Portfolio
+from app.db.schema import SearchResult, SearchResults
+from app.db.enum import ContentType
+
+"""
+A script to define the full-text search endpoint over services and portfolio items.
+
+Matching and ranking use the generated, GIN-indexed search_vector columns.
+Snippets are only computed for the rows of the requested page, since
+ts_headline re-parses the document text. Snippets are HTML: ts_headline runs
+on the raw text with private-use marker characters as selectors (escaping
+first would let queries like "amp" or "lt" match inside the entities), then
+the snippet is escaped and the markers become the <mark> tags, which are the
+only markup in it.
+"""
+
+router = APIRouter()
+
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_OFFSET = 1000
+# Unicode private-use characters, stripped from documents so only ts_headline emits them
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", MaxFragments=2, MaxWords=20, MinWords=5'
+)
+
+
+def html_escape(text):
+
+    """
+    Escapes &, < and > in a SQL text expression, so stored markup is shown as text.
+    """
+
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        text = func.replace(text, char, entity)
+    return text
+
+
+def highlight(document, query):
+
+    """
+    Builds the HTML snippet of a SQL text expression: the query terms wrapped in <mark>, the rest escaped.
+    """
+
+    document = func.translate(document, HIGHLIGHT_START + HIGHLIGHT_STOP, "")
+    snippet = html_escape(func.ts_headline("english", document, query, HEADLINE_OPTIONS))
+    return func.replace(func.replace(snippet, HIGHLIGHT_START, "<mark>"), HIGHLIGHT_STOP, "</mark>")
+
+
+def search_statement(q: str, content_type: Optional[ContentType], limit: int, offset: int):
+
+    """
+    Builds the ranked search query.
+
+    Args:
+        q (str): The user's query, in web search syntax ("quoted phrases", -exclusions, or).
+        content_type (ContentType, optional): Restrict results to one content type.
+        limit (int): Page size (one extra row is fetched to detect a next page).
+        offset (int): Number of ranked results to skip.
+
+    Returns:
+        Select: The search statement.
+    """
+
+    query = func.websearch_to_tsquery("english", q)
+
+    branches = []
+    if content_type in (None, ContentType.SERVICE):
+        branches.append(
+            select(
+                literal(ContentType.SERVICE.value).label("type"),
+                Service.id,
+                Service.title,
+                Service.category,
+                Service.image1.label("image"),
+                func.concat_ws(" ", Service.heading1, Service.heading2, Service.detail1, Service.detail2).label("document"),
+                func.ts_rank_cd(Service.search_vector, query).label("rank"),
+            ).where(Service.search_vector.op("@@")(query))
+        )
+    if content_type in (None, ContentType.PORTFOLIO):
+        branches.append(
+            select(
+                literal(ContentType.PORTFOLIO.value).label("type"),
+                Portfolio.id,
+                Portfolio.title,
+                Portfolio.category,
+                Portfolio.image,
+                Portfolio.description.label("document"),
+                func.ts_rank_cd(Portfolio.search_vector, query).label("rank"),
+            ).where(Portfolio.search_vector.op("@@")(query))
+        )
+
+    matches = (branches[0] if len(branches) == 1 else union_all(*branches)).subquery()
+    page = (
+        select(matches)
+        .order_by(matches.c.rank.desc(), matches.c.id)
+        .limit(limit + 1)
+        .offset(offset)
+        .subquery()
+    )
+
+    # concat_ws skips NULLs but returns '' when every part is NULL
+    document = func.coalesce(func.nullif(page.c.document, ""), page.c.title)
+
+    return select(
+        page.c.type,
+        page.c.id,
+        page.c.title,
+        page.c.category,
+        page.c.image,
+        page.c.rank,
+        highlight(document, query).label("snippet"),
+    ).order_by(page.c.rank.desc(), page.c.id)
+
+
+@router.get("", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[ContentType] = Query(None),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    db: AsyncSession = Depends(get_read_session),
+):
+
+    """
+    Searches services and portfolio items, best matches first.
+
+    Args:
+        q (str): The search query.
+        type (ContentType, optional): Only search services or only portfolio items.
+        limit (int): Page size.
+        offset (int): `next_offset` of the previous page.
+        db (AsyncSession): The read-only database session.
+
+    Returns:
+        SearchResults: One page of ranked results with HTML-escaped, <mark>-highlighted snippets, and the
+        offset of the next page.
+    """
+
+    result = await db.execute(search_statement(q, type, limit, offset))
+    rows = result.all()
+
+    results = [SearchResult.model_validate(row) for row in rows[:limit]]
+    next_offset = offset + limit if len(rows) > limit else None
+
+    return SearchResults(results=results, next_offset=next_offset)
@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
-import shutil
-import os
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List, Optional
 import uuid
 
 
-from app.db.session import get_session
+from app.core.config import get_settings
+from app.db.session import get_session, get_read_session_factory, ReadSessionFactory
+from app.db.change_feed import notify_change, change_listener
+from app.db.content_store import bulk_create, bulk_update, bulk_delete, parse_bulk_items, SERVICE_CONTENT
 from app.db.models import Service, User
-from app.db.schema import ServiceCreate, ServiceUpdate, ServiceResponse, BaseOutput
+from app.db.schema import ServiceCreate, ServiceUpdate, ServiceResponse, BaseOutput, BulkResult, BulkDelete
 from app.routes.auth import get_active_user
-from app.db.enum import UserType
+from app.utility.uploads import save_upload, remove_upload
+from app.db.enum import UserType, ContentType
+from app.utility.pagination import keyset_page, next_cursor, PAGE_MAX_LIMIT, NEXT_CURSOR_HEADER
+from app.utility.projection import parse_fields, projection_columns, serialize_listing
+from app.utility.content_cache import content_cache, CachedListing
+from app.utility.prefix_index import suggest_index
 
-router = APIRouter()
+# Loading Settings
+settings = get_settings()
 
-STATIC_DIR = "static"
+router = APIRouter()
 
 async def check_admin(user: User = Depends(get_active_user)):
     if user.user_type != UserType.ADMIN:
@@ -27,12 +34,119 @@ async def check_admin(user: User = Depends(get_active_user)):
 
 @router.get("", response_model=List[ServiceResponse])
 async def get_all_services(
-    db: AsyncSession = Depends(get_session),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    read_session: ReadSessionFactory = Depends(get_read_session_factory),
     # user: User = Depends(check_admin)
 ):
-    result = await db.execute(select(Service))
-    services = result.scalars().all()
-    return services
+    
+    """
+    Lists services in a stable (created_at, id) order.
+
+    Without `limit` every row is returned, as before. With `limit` one page is
+    returned and the cursor of the next page is sent in the X-Next-Cursor header
+    (absent on the last page). With `fields` (comma-separated) only those columns
+    are selected and returned. Responses are served from the content cache
+    and carry an ETag; a matching If-None-Match gets a 304.
+
+    Args:
+        request (Request): The incoming request (for If-None-Match).
+        limit (int, optional): Page size.
+        cursor (str, optional): X-Next-Cursor of the previous page.
+        category (str, optional): Only return items in this category.
+        fields (str, optional): Subset of response fields to return.
+        read_session (ReadSessionFactory): Opens the read-only database session on a cache miss.
+
+    Returns:
+        List: The services.
+    """
+    
+    projection = parse_fields(fields, ServiceResponse)
+
+    async def load(db: AsyncSession) -> CachedListing:
+        stmt = select(*projection_columns(Service, projection)) if projection else select(Service)
+        if category is not None:
+            stmt = stmt.where(Service.category == category)
+
+        result = await db.execute(keyset_page(stmt, Service, limit, cursor))
+        rows = list(result.all() if projection else result.scalars().all())
+
+        next_page = next_cursor(rows, limit)
+        headers = {NEXT_CURSOR_HEADER: next_page} if next_page is not None else {}
+        return CachedListing(body=serialize_listing(ServiceResponse, projection, rows), headers=headers)
+
+    return await content_cache.respond(request, read_session, Service.__tablename__, ServiceResponse, (limit, cursor, category, projection), load,
+                                       settings.SERVICES_CACHE_CONTROL)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_services(
+    items: str = Form(...),
+    files: List[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Creates many services in one transaction.
+
+    Args:
+        items (str): JSON array of services; image fields name one of the uploaded `files`.
+        files (List[UploadFile], optional): The images referenced by the items.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+    
+    return await bulk_create(db, SERVICE_CONTENT, parse_bulk_items(items), files)
+
+@router.put("/bulk", response_model=BulkResult)
+async def bulk_update_services(
+    items: str = Form(...),
+    files: List[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Updates many services in one transaction. Fields left out keep their value.
+
+    Args:
+        items (str): JSON array of changes, each with the `id` of the service to update.
+        files (List[UploadFile], optional): The images referenced by the items.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every item, in request order.
+    """
+    
+    return await bulk_update(db, SERVICE_CONTENT, parse_bulk_items(items), files)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_services(
+    payload: BulkDelete,
+    db: AsyncSession = Depends(get_session),
+    user: User = Depends(check_admin)
+):
+    
+    """
+    Deletes many services (and their images) in one transaction.
+
+    Args:
+        payload (BulkDelete): The ids to delete.
+        db (AsyncSession): The database session.
+        user (User): The admin performing the request.
+
+    Returns:
+        BulkResult: The outcome of every id, in request order.
+    """
+    
+    return await bulk_delete(db, SERVICE_CONTENT, payload.ids)
 
 @router.get("/{id}", response_model=ServiceResponse)
 async def get_service(
@@ -64,24 +178,10 @@ async def create_service(
 
     try:
         if image1:
-            file_extension = image1.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(STATIC_DIR, file_name)
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image1.file, buffer)
-            
-            image1_url = f"/static/{file_name}"
+            image1_url = save_upload(image1)
         
         if image2:
-            file_extension = image2.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(STATIC_DIR, file_name)
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image2.file, buffer)
-            
-            image2_url = f"/static/{file_name}"
+            image2_url = save_upload(image2)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
@@ -97,8 +197,13 @@ async def create_service(
         image2=image2_url
     )
     db.add(new_service)
+    await db.flush()
+    version = await notify_change(db, Service.__tablename__, "create", [new_service.id])
     await db.commit()
+    change_listener.observe(Service.__tablename__, version)
+    content_cache.invalidate(Service.__tablename__)
     await db.refresh(new_service)
+    suggest_index.add(ContentType.SERVICE, new_service.id, new_service.title, new_service.category)
     return new_service
 
 @router.put("/{id}", response_model=ServiceResponse)
@@ -136,51 +241,23 @@ async def update_service(
     try:
         if image1:
             # Delete old image1 if exists
-            if service.image1:
-                relative_path = service.image1.lstrip("/")
-                old_file_path = relative_path  # Assuming static is in root or handled correctly
-                # We might need to adjust path if static is not in current working dir
-                # but based on provided code, os.path.join(STATIC_DIR) was used.
-                # Let's be consistent with delete logic.
-                
-                # The create logic uses: os.path.join(STATIC_DIR, file_name)
-                # The url is: /static/filename
-                # So to get path: remove /static/ and join with STATIC_DIR? 
-                
-                # Previous code did: service.image.lstrip("/") -> static/filename
-                if os.path.exists(relative_path):
-                     os.remove(relative_path)
-
-            file_extension = image1.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(STATIC_DIR, file_name)
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image1.file, buffer)
-            
-            service.image1 = f"/static/{file_name}"
+            remove_upload(service.image1)
+            service.image1 = save_upload(image1)
             
         if image2:
             # Delete old image2 if exists
-            if service.image2:
-                relative_path = service.image2.lstrip("/")
-                if os.path.exists(relative_path):
-                     os.remove(relative_path)
-
-            file_extension = image2.filename.split(".")[-1]
-            file_name = f"{uuid.uuid4()}.{file_extension}"
-            file_path = os.path.join(STATIC_DIR, file_name)
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image2.file, buffer)
-            
-            service.image2 = f"/static/{file_name}"
+            remove_upload(service.image2)
+            service.image2 = save_upload(image2)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
     
+    version = await notify_change(db, Service.__tablename__, "update", [service.id])
     await db.commit()
+    change_listener.observe(Service.__tablename__, version)
+    content_cache.invalidate(Service.__tablename__)
     await db.refresh(service)
+    suggest_index.add(ContentType.SERVICE, service.id, service.title, service.category)
     return service
 
 @router.delete("/{id}", response_model=BaseOutput)
@@ -195,16 +272,13 @@ async def delete_service(
         raise HTTPException(status_code=404, detail="Service not found")
     
     # Delete Images from Static Folder
-    if service.image1:
-        relative_path = service.image1.lstrip("/")
-        if os.path.exists(relative_path):
-            os.remove(relative_path)
-            
-    if service.image2:
-        relative_path = service.image2.lstrip("/")
-        if os.path.exists(relative_path):
-            os.remove(relative_path)
+    remove_upload(service.image1)
+    remove_upload(service.image2)
 
     await db.delete(service)
+    version = await notify_change(db, Service.__tablename__, "delete", [id])
     await db.commit()
+    change_listener.observe(Service.__tablename__, version)
+    content_cache.invalidate(Service.__tablename__)
+    suggest_index.remove(id)
     return BaseOutput(message="Service deleted successfully", detail=f"Service with id {id} has been deleted")
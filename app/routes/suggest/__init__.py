@@ -0,0 +1 @@
+from .suggest import router
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Query
+from sqlalchemy import select
+from typing import List, Optional
+import uuid
+
+from app.core.config import get_logger
+from app.db.session import async_read_session
+from app.db.change_feed import change_listener
+from app.db.models import Service, Portfolio
+from app.db.schema import SuggestResult
+from app.db.enum import ContentType
+from app.utility.prefix_index import suggest_index
+
+"""
+A script to define the type-ahead endpoint over service and portfolio titles and categories.
+
+Suggestions are answered from the in-process prefix index, which is loaded
+once at startup, kept current by the create/update/delete routes of this
+worker and refreshed from the change feed for edits made on other workers.
+"""
+
+router = APIRouter()
+logger = get_logger()
+
+SUGGEST_MAX_RESULTS = 20
+
+# Content tables feeding the index
+SUGGEST_SOURCES = {
+    Service.__tablename__: (Service, ContentType.SERVICE),
+    Portfolio.__tablename__: (Portfolio, ContentType.PORTFOLIO),
+}
+
+
+async def load_suggest_index():
+
+    """
+    Loads every service and portfolio title and category into the prefix index.
+    """
+
+    async with async_read_session() as db:
+        for model, kind in SUGGEST_SOURCES.values():
+            rows = await db.execute(select(model.id, model.title, model.category))
+            suggest_index.replace(kind, rows.all())
+
+    logger.info(f"Suggestion index loaded: {suggest_index.stats()}")
+
+
+@change_listener.on(*SUGGEST_SOURCES)
+async def refresh_suggest_index(table: str, ids: Optional[List[uuid.UUID]]):
+
+    """
+    Re-reads changed rows into the prefix index (the whole table when ids is None).
+
+    Args:
+        table (str): The table that changed.
+        ids (List[uuid.UUID], optional): The changed rows.
+    """
+
+    model, kind = SUGGEST_SOURCES[table]
+    stmt = select(model.id, model.title, model.category)
+
+    async with async_read_session() as db:
+        if ids is None:
+            rows = await db.execute(stmt)
+            suggest_index.replace(kind, rows.all())
+            return
+
+        rows = (await db.execute(stmt.where(model.id.in_(ids)))).all()
+
+    for row in rows:
+        suggest_index.add(kind, row.id, row.title, row.category)
+    for id in set(ids) - {row.id for row in rows}:
+        suggest_index.remove(id)
+
+
+@router.get("", response_model=List[SuggestResult])
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    type: Optional[ContentType] = Query(None),
+    limit: int = Query(8, ge=1, le=SUGGEST_MAX_RESULTS),
+):
+
+    """
+    Suggests services and portfolio items whose title or category starts with `q`
+    (or has a word in the title that does).
+
+    Args:
+        q (str): What the user has typed so far.
+        type (ContentType, optional): Only suggest services or only portfolio items.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        List[SuggestResult]: The suggestions.
+    """
+
+    return suggest_index.search(q, limit, type)
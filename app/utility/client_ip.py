@@ -0,0 +1,60 @@
+import ipaddress
+from typing import List, Union
+from fastapi.requests import Request
+from app.core.config import get_settings
+
+"""
+A script to resolve the client IP address behind trusted reverse proxies.
+
+request.client.host is the peer of the TCP connection, which behind a reverse
+proxy is the proxy itself. When the peer is one of TRUSTED_PROXIES (comma
+separated addresses or CIDR ranges), X-Forwarded-For is read from the right,
+skipping the trusted hops: the first untrusted address is the client. Hops
+to its left were supplied by the client and are never used.
+"""
+
+# Loading Settings
+settings = get_settings()
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(value: str) -> List[Network]:
+    return [ipaddress.ip_network(entry.strip(), strict=False) for entry in value.split(",") if entry.strip()]
+
+
+TRUSTED_PROXIES = parse_networks(settings.TRUSTED_PROXIES)
+
+
+def is_trusted(address: str, networks: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request: Request, trusted: List[Network] = TRUSTED_PROXIES) -> str:
+
+    """
+    Returns the address of the client that made the request.
+
+    Args:
+        request (Request): The incoming request.
+        trusted (List[Network]): The reverse proxies whose X-Forwarded-For is honoured.
+
+    Returns:
+        str: The client IP address.
+    """
+
+    peer = request.client.host if request.client else ""
+    if not trusted or not is_trusted(peer, trusted):
+        return peer
+
+    hops = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted(hop, trusted):
+            return hop
+
+    # Every hop is a trusted proxy: the leftmost one is the closest we get to the client
+    return hops[0] if hops else peer
@@ -0,0 +1,452 @@
+import asyncio
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple, Type
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import HTTP_304_NOT_MODIFIED, HTTP_503_SERVICE_UNAVAILABLE
+from app.core.config import get_settings
+from app.db.change_feed import change_listener, get_content_version
+from app.db.session import READ_PRIMARY_COOKIE, read_engine
+from app.utility.CustomException import CustomHttpException
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+"""
+A script to define the in-process read-through cache of public content listings.
+
+Entries hold the serialized JSON body (and headers) of a listing response,
+keyed by table and query parameters, so a hit skips Postgres, the ORM and
+pydantic altogether. The cache is bounded by entry count and by total body
+bytes (least recently used entries go first) and every entry expires after
+CONTENT_CACHE_TTL_SECONDS.
+
+Admin writes invalidate every entry of the table they touched, on this
+worker directly and on the others through the change feed.
+
+Misses are single-flight: while one request loads a listing, identical
+requests wait for its result (or its error) instead of querying too, so a
+burst on a cold or just-invalidated key costs one query.
+
+Listings carry a strong ETag built from the content version of their table
+(read before the rows, so it never claims newer content than the body
+holds). A request whose If-None-Match matches the current version, as
+known from the change feed, gets a 304 before the cache, the database or
+the serializer is touched.
+
+Bodies are serialized once per content change and kept as immutable bytes,
+alongside gzip (and brotli, when the package is installed) encodings made
+at the same time, off the event loop. A hit only picks the encoding the
+client accepts and hands the bytes to the server as they are.
+
+With a read replica, entries may have been loaded from it. Clients pinned
+to the primary after a write (the Read_primary cookie) therefore bypass
+the cache and the 304 shortcut, and read from the primary.
+"""
+
+# Loading Settings
+settings = get_settings()
+
+CacheKey = Tuple[str, Hashable]
+
+# Encodings are made once per content change, so the strongest levels are affordable
+COMPRESS_MIN_BYTES = int(settings.CONTENT_COMPRESS_MIN_BYTES)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Content-codings in server preference order
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+VARY_HEADERS = {"Vary": "Accept-Encoding"}
+
+
+@dataclass(frozen=True)
+class CachedListing:
+
+    """
+    A serialized listing response
+    """
+
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    # Content-coding -> pre-compressed body
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+    def response(self, cache_control: Optional[str] = None, accept_encoding: Optional[str] = None) -> Response:
+        coding = next((coding for coding in accepted_encodings(accept_encoding) if coding in self.encoded), None)
+        headers = {**self.headers, **VARY_HEADERS}
+        body = self.body
+
+        if coding is not None:
+            body = self.encoded[coding]
+            headers["Content-Encoding"] = coding
+        if self.etag:
+            headers["ETag"] = encoded_etag(self.etag, coding)
+        if cache_control:
+            headers["Cache-Control"] = cache_control
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def compress_body(body: bytes) -> Dict[str, bytes]:
+
+    """
+    Pre-compresses a listing body in every supported encoding, keeping only those that are smaller.
+
+    Args:
+        body (bytes): The JSON body.
+
+    Returns:
+        Dict[str, bytes]: Content-coding -> compressed body (empty for small bodies).
+    """
+
+    if len(body) < COMPRESS_MIN_BYTES:
+        return {}
+
+    encoded = {"gzip": gzip.compress(body, GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return {coding: data for coding, data in encoded.items() if len(data) < len(body)}
+
+
+@lru_cache(maxsize=256)
+def accepted_encodings(accept_encoding: Optional[str]) -> Tuple[str, ...]:
+
+    """
+    Parses an Accept-Encoding header into the supported codings the client accepts, best first.
+
+    Args:
+        accept_encoding (str, optional): The request header.
+
+    Returns:
+        Tuple[str, ...]: Accepted codings by descending q-value, then server preference.
+    """
+
+    if not accept_encoding:
+        return ()
+
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+
+    ranked = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in SUPPORTED_ENCODINGS]
+    return tuple(coding for weight, coding in sorted(ranked, key=lambda item: -item[0]) if weight > 0)
+
+
+def encoded_etag(etag: str, coding: Optional[str]) -> str:
+    # Each encoding is its own representation, so it needs its own strong tag
+    return f'{etag[:-1]}-{coding}"' if coding else etag
+
+
+def listing_etag(table: str, version: int, schema: Type[BaseModel], params: Hashable) -> str:
+    # The schema's fields are part of the tag so a deploy that changes the response shape changes it too
+    digest = hashlib.blake2b(repr((schema.__name__, tuple(schema.model_fields), params)).encode(), digest_size=8)
+    return f'"{table}.{version}.{digest.hexdigest()}"'
+
+
+def matched_etag(if_none_match: Optional[str], etag: Optional[str]) -> Optional[str]:
+
+    """
+    Evaluates an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires),
+    treating the encoded variants of the ETag as matches too.
+
+    Args:
+        if_none_match (str, optional): The request header.
+        etag (str, optional): The current ETag, without encoding suffix.
+
+    Returns:
+        str | None: The client's matching tag (to echo in the 304), or None if its copy is stale.
+    """
+
+    if not if_none_match or not etag:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+
+    variants = {etag} | {encoded_etag(etag, coding) for coding in SUPPORTED_ENCODINGS}
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag in variants:
+            return tag
+    return None
+
+
+class ContentCache:
+
+    """
+    Bounded TTL/LRU cache of (table, params) -> CachedListing
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, settle: float = 0, coalesce_timeout: float = 10):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.coalesce_timeout = coalesce_timeout
+        # After an invalidation, entries only live this long (a lagging replica may still serve old rows)
+        self.settle = settle
+        self._entries: "OrderedDict[CacheKey, Tuple[float, CachedListing]]" = OrderedDict()
+        self._by_table: Dict[str, Set[CacheKey]] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        self._generation: Dict[str, int] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.coalesce_timeouts = 0
+        self.not_modified = 0
+        self.pinned_reads = 0
+
+    def get(self, table: str, params: Hashable) -> Optional[CachedListing]:
+        key = (table, params)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, listing = entry
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return listing
+
+    def set(self, table: str, params: Hashable, listing: CachedListing):
+        if self.max_entries <= 0 or self.ttl <= 0 or listing.size > self.max_bytes:
+            return
+
+        now = time.monotonic()
+        ttl = self.ttl
+        if now - self._invalidated_at.get(table, float("-inf")) < self.settle:
+            ttl = min(ttl, self.settle)
+
+        key = (table, params)
+        self._discard(key)
+        self._entries[key] = (now + ttl, listing)
+        self._by_table.setdefault(table, set()).add(key)
+        self._bytes += listing.size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def get_or_load(self, table: str, params: Hashable, loader: Callable[[], Awaitable[CachedListing]]) -> CachedListing:
+
+        """
+        Returns the cached listing, or builds it with `loader` and caches it. Concurrent
+        misses on the same key share a single `loader` call.
+
+        Args:
+            table (str): The table the listing reads.
+            params (Hashable): The query parameters that shape the listing.
+            loader (Callable): Coroutine function building the listing on a miss.
+
+        Returns:
+            CachedListing: The listing.
+
+        Raises:
+            CustomHttpException: 503 if the shared load takes longer than the coalesce timeout.
+        """
+
+        key = (table, params)
+
+        while True:
+            listing = self.get(table, params)
+            if listing is not None:
+                return listing
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+
+            # asyncio.wait neither cancels the shared load on timeout nor raises when it is
+            # cancelled, so a CancelledError out of it is always this request's own
+            self.coalesced += 1
+            done, _ = await asyncio.wait({inflight}, timeout=self.coalesce_timeout)
+
+            if not done:
+                self.coalesce_timeouts += 1
+                raise CustomHttpException(
+                    status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Content is taking too long to load, please retry shortly",
+                    message="Server Busy",
+                    headers={"Retry-After": "1"},
+                )
+
+            # The loading request was cancelled (client went away): retry
+            if inflight.cancelled():
+                continue
+            return inflight.result()
+
+        generation = self._generation.get(table, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.loads += 1
+
+        try:
+            listing = await loader()
+
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved, nobody may be waiting
+            future.exception()
+            raise
+
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        # Don't cache a listing read before a write that invalidated the table
+        if self._generation.get(table, 0) == generation:
+            self.set(table, params, listing)
+
+        future.set_result(listing)
+        return listing
+
+    def invalidate(self, table: str):
+        self._invalidated_at[table] = time.monotonic()
+        self._generation[table] = self._generation.get(table, 0) + 1
+
+        # Requests arriving from now on must not join loads that started before the write
+        for key in [key for key in self._inflight if key[0] == table]:
+            del self._inflight[key]
+
+        for key in list(self._by_table.get(table, ())):
+            self._discard(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_table.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "loads": self.loads,
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "coalesce_timeouts": self.coalesce_timeouts,
+            "not_modified": self.not_modified,
+            "pinned_reads": self.pinned_reads,
+            "encodings": list(SUPPORTED_ENCODINGS),
+        }
+
+    def _discard(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1].size
+        keys = self._by_table.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_table[key[0]]
+
+
+    async def respond(self, request: Request, open_session: Callable[[], AsyncContextManager[AsyncSession]], table: str,
+                      schema: Type[BaseModel], params: Hashable, loader: Callable[[AsyncSession], Awaitable[CachedListing]],
+                      cache_control: Optional[str] = None) -> Response:
+
+        """
+        Serves a listing endpoint: 304 if the client's ETag is current, else the cached
+        (or freshly loaded) listing in the best encoding the client accepts, with its
+        ETag and Cache-Control. A session is only opened to load a miss.
+
+        Args:
+            request (Request): The incoming request.
+            open_session (Callable): Opens the session a miss is loaded with.
+            table (str): The table the listing reads.
+            schema (Type[BaseModel]): The response schema of the endpoint.
+            params (Hashable): The query parameters that shape the listing.
+            loader (Callable): Coroutine function building the listing from the session on a miss.
+            cache_control (str, optional): The Cache-Control header to send.
+
+        Returns:
+            Response: The listing, or an empty 304.
+        """
+
+        if_none_match = request.headers.get("if-none-match")
+        headers = {**VARY_HEADERS, "Cache-Control": cache_control} if cache_control else VARY_HEADERS
+
+        # Cached listings may come from a lagging replica; a client that just wrote must see its write
+        pinned = read_engine is not None and READ_PRIMARY_COOKIE in request.cookies
+
+        version = change_listener.version(table)
+        if if_none_match and version is not None and not pinned:
+            etag = matched_etag(if_none_match, listing_etag(table, version, schema, params))
+            if etag is not None:
+                self.not_modified += 1
+                return Response(status_code=HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": etag})
+
+        async def load_versioned(compress: bool = True) -> CachedListing:
+            async with open_session() as db:
+                version = await get_content_version(db, table)
+                listing = await loader(db)
+            encoded = await asyncio.to_thread(compress_body, listing.body) if compress else {}
+            return replace(listing, etag=listing_etag(table, version, schema, params), encoded=encoded)
+
+        # Pinned reads are served from the primary (open_session), uncached and uncompressed
+        if pinned:
+            self.pinned_reads += 1
+            listing = await load_versioned(compress=False)
+        else:
+            listing = await self.get_or_load(table, params, load_versioned)
+        etag = matched_etag(if_none_match, listing.etag)
+        if etag is not None:
+            self.not_modified += 1
+            return Response(status_code=HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": etag})
+
+        return listing.response(cache_control, request.headers.get("accept-encoding"))
+
+
+# Process-wide cache instance
+content_cache = ContentCache(
+    max_entries=int(settings.CONTENT_CACHE_MAX_ENTRIES),
+    max_bytes=int(settings.CONTENT_CACHE_MAX_BYTES),
+    ttl=float(settings.CONTENT_CACHE_TTL_SECONDS),
+    settle=float(settings.READ_YOUR_WRITES_SECONDS) if settings.READ_DATABASE_URL else 0,
+    coalesce_timeout=float(settings.CONTENT_CACHE_COALESCE_TIMEOUT_SECONDS),
+)
@@ -1,8 +1,14 @@
 from datetime import datetime, timezone, timedelta
+import hashlib
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import get_settings, get_logger
+from app.utility.CustomException import CustomHttpException
 from fastapi.security import OAuth2PasswordBearer
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
 
 # OAuth2 Scheme Init
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -18,8 +24,18 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# Values of the `typ` claim; a token is only accepted where its type is expected
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# Bounded pool for bcrypt work (bcrypt releases the GIL, so threads run it in parallel
+# without blocking the event loop)
+hash_executor = ThreadPoolExecutor(max_workers=int(settings.HASH_POOL_WORKERS), thread_name_prefix="bcrypt")
+HASH_POOL_MAX_PENDING = int(settings.HASH_POOL_MAX_PENDING)
+hash_pending = 0
+
 # Create access token
-def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
+def create_access_token(data: dict, expires_delta: timedelta = None, token_type: str = ACCESS_TOKEN_TYPE) -> str:
     
     """
     Create an access token
@@ -27,12 +43,15 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     Args:
         data (dict): A dictionary with the payload of the token
         expires_delta (timedelta, optional): The time in which the token will expire. Defaults to None.
+        token_type (str, optional): The `typ` claim. Defaults to "access".
 
     Returns:
         str: The encoded JWT token
     """
     
     to_encode = data.copy()
+    to_encode["typ"] = token_type
+    to_encode.setdefault("jti", str(uuid.uuid4()))
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -41,12 +60,34 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Identity claims for issued tokens
+def user_claims(user) -> dict:
+    
+    """
+    Build the identity claims embedded in access tokens. Besides `sub`, the user id, name
+    and user_type let stateless mode authorize from the token alone.
+
+    Args:
+        user (User): The user the tokens are issued to.
+
+    Returns:
+        dict: The claims to pass to create_access_token / create_refresh_token.
+    """
+    
+    return {
+        "sub": user.email,
+        "uid": str(user.id),
+        "name": user.name,
+        "user_type": str(user.user_type),
+    }
+
 # Create refresh token
 def create_refresh_token(data: dict) -> str:
     
     """
-    Create a refresh token. This is just a wrapper around create_access_token
-    with a longer expiration time.
+    Create a refresh token: typ "refresh", a longer expiration time and only the `sub`
+    claim of `data`. Authorization claims stay out of it; /auth/refresh reads them from
+    the user row when it issues the next access token.
 
     Args:
         data (dict): A dictionary with the payload of the token
@@ -55,7 +96,7 @@ def create_refresh_token(data: dict) -> str:
         str: The encoded JWT token
     """
     
-    return create_access_token(data, timedelta(days=30))
+    return create_access_token({"sub": data["sub"]}, timedelta(days=30), token_type=REFRESH_TOKEN_TYPE)
 
 # Verify password
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -88,11 +129,78 @@ def get_password_hash(password: str) -> str:
     
     return pwd_context.hash(password)
 
+# Run a hashing call on the bounded pool
+async def run_in_hash_pool(func, *args):
+    
+    """
+    Run a blocking password hashing function on the bcrypt worker pool.
+
+    Args:
+        func (callable): The blocking function to run.
+        *args: Positional arguments for the function.
+
+    Returns:
+        The return value of the function.
+
+    Raises:
+        CustomHttpException: 503 if the pool already has HASH_POOL_MAX_PENDING calls queued or running.
+    """
+    
+    global hash_pending
+    if hash_pending >= HASH_POOL_MAX_PENDING:
+        logger.error("Password hashing pool saturated, rejecting request")
+        raise CustomHttpException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            message="Server Busy",
+            headers={"Retry-After": "1"},
+        )
+    
+    hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hash_executor, func, *args)
+    finally:
+        hash_pending -= 1
+
+# Verify password off the event loop
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    
+    """
+    Verify a plaintext password against its hashed version on the bcrypt worker pool.
+
+    Args:
+        plain_password (str): The plaintext password to verify.
+        hashed_password (str): The hashed version of the password.
+
+    Returns:
+        bool: Whether the plaintext password matches the hashed password.
+    """
+    
+    return await run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+# Hash password off the event loop
+async def get_password_hash_async(password: str) -> str:
+    
+    """
+    Hash a plaintext password on the bcrypt worker pool.
+
+    Args:
+        password (str): The plaintext password to hash.
+
+    Returns:
+        str: The hashed version of the password.
+    """
+    
+    return await run_in_hash_pool(get_password_hash, password)
+
 # Decode JWT token
 def decode_token(token: str, token_type="access"):
     
     """
-    Decode a JWT token.
+    Decode a JWT token and check that it is of the expected type. Tokens issued before
+    the `typ` claim existed carry none and are let through; they are still only accepted
+    where their digest matches the corresponding auth_tokens column.
 
     Args:
         token (str): The JWT token to decode.
@@ -102,14 +210,31 @@ def decode_token(token: str, token_type="access"):
         dict: The decoded payload of the token.
 
     Raises:
-        ValueError: If the token is invalid.
+        ValueError: If the token is invalid or of another type.
     """
     
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError as e:
         logger.error(f"JWT Error: {e}")
         raise ValueError("Invalid token")
     
+    if payload.get("typ", token_type) != token_type:
+        logger.error(f"JWT Error: expected a {token_type} token, got {payload.get('typ')}")
+        raise ValueError("Invalid token type")
+    return payload
 
+# Digest JWT token
+def hash_token(token: str) -> bytes:
+    
+    """
+    Compute a fixed-size SHA-256 digest of a token.
+
+    Args:
+        token (str): The JWT token to digest.
+
+    Returns:
+        bytes: The 32-byte digest of the token.
+    """
+    
+    return hashlib.sha256(token.encode()).digest()
@@ -0,0 +1,104 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import Select, tuple_
+from starlette.status import HTTP_400_BAD_REQUEST
+from app.utility.CustomException import CustomHttpException
+
+"""
+A script to define keyset (cursor) pagination for the content list endpoints.
+
+Rows are ordered by (created_at, id), which is unique and backed by an index
+on every content table, so each page is an index range scan that starts
+right after the last row of the previous page. Unlike OFFSET, the cost of a
+page does not grow with how deep into the list it is.
+
+The cursor handed to clients is an opaque, URL-safe encoding of the
+(created_at, id) pair of the last row returned.
+"""
+
+PAGE_MAX_LIMIT = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor from the client.
+
+    Returns:
+        Tuple[datetime, uuid.UUID]: The (created_at, id) of the last row of the previous page.
+
+    Raises:
+        CustomHttpException: 400 if the cursor is malformed.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CustomHttpException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+            message="Invalid Cursor",
+        )
+
+
+def keyset_page(stmt: Select, model, limit: Optional[int], cursor: Optional[str]) -> Select:
+
+    """
+    Applies the stable (created_at, id) order and, when `limit` is given, the keyset window.
+
+    One row beyond `limit` is fetched so next_cursor can tell whether another page exists.
+
+    Args:
+        stmt (Select): The base SELECT over `model`.
+        model: The mapped class being listed.
+        limit (int, optional): Page size; None keeps the unpaginated behaviour.
+        cursor (str, optional): Cursor of the previous page.
+
+    Returns:
+        Select: The ordered (and windowed) statement.
+    """
+
+    stmt = stmt.order_by(model.created_at, model.id)
+
+    if cursor is not None:
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(*decode_cursor(cursor)))
+
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+
+    return stmt
+
+
+def next_cursor(rows: List, limit: Optional[int]) -> Optional[str]:
+
+    """
+    Trims the look-ahead row off `rows` in place and returns the cursor of the next page.
+
+    Args:
+        rows (List): The rows fetched with keyset_page.
+        limit (int, optional): The requested page size.
+
+    Returns:
+        str | None: The cursor of the next page, or None on the last page.
+    """
+
+    if limit is None or len(rows) <= limit:
+        return None
+
+    del rows[limit:]
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
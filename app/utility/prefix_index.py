@@ -0,0 +1,158 @@
+import uuid
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.db.enum import ContentType
+
+"""
+A script to define the in-process prefix index behind /api/suggest.
+
+Every item is indexed under its full title, under the remainder of its
+title starting at each later word (so "web" finds "Custom Web Design"),
+and under its category. Terms live in one sorted array per content type;
+a lookup is a binary search to the first term >= the prefix followed by a
+short forward scan, so it never touches Postgres and stays well under a
+millisecond for thousands of items.
+"""
+
+MAX_WORD_TERMS = 8
+
+
+@dataclass(frozen=True)
+class Suggestion:
+
+    """
+    The fields returned for a suggested item
+    """
+
+    type: ContentType
+    id: uuid.UUID
+    title: str
+    category: Optional[str]
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def index_terms(title: str, category: Optional[str]) -> List[str]:
+    words = normalize(title or "").split(" ")
+    terms = {" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_TERMS))}
+    if category:
+        terms.add(normalize(category))
+    terms.discard("")
+    return sorted(terms)
+
+
+class PrefixIndex:
+
+    """
+    Sorted-array prefix index of content titles and categories
+    """
+
+    def __init__(self):
+        self._keys: Dict[ContentType, List[Tuple[str, uuid.UUID]]] = {kind: [] for kind in ContentType}
+        self._items: Dict[uuid.UUID, Suggestion] = {}
+        self._terms: Dict[uuid.UUID, List[str]] = {}
+
+    def add(self, kind: ContentType, id: uuid.UUID, title: str, category: Optional[str]):
+
+        """
+        Indexes an item, replacing its previous entry if it was already indexed.
+
+        Args:
+            kind (ContentType): The content type of the item.
+            id (uuid.UUID): The item id.
+            title (str): The item title.
+            category (str, optional): The item category.
+        """
+
+        self.remove(id)
+
+        keys = self._keys[kind]
+        terms = index_terms(title, category)
+        for term in terms:
+            insort(keys, (term, id))
+
+        self._items[id] = Suggestion(type=kind, id=id, title=title, category=category)
+        self._terms[id] = terms
+
+    def remove(self, id: uuid.UUID):
+        item = self._items.pop(id, None)
+        if item is None:
+            return
+
+        keys = self._keys[item.type]
+        for term in self._terms.pop(id):
+            i = bisect_left(keys, (term, id))
+            if i < len(keys) and keys[i] == (term, id):
+                del keys[i]
+
+    def replace(self, kind: ContentType, rows: Iterable):
+
+        """
+        Rebuilds the index of one content type from (id, title, category) rows.
+
+        Args:
+            kind (ContentType): The content type being loaded.
+            rows (Iterable): Rows with id, title and category attributes.
+        """
+
+        for id in [id for id, item in self._items.items() if item.type == kind]:
+            del self._items[id]
+            del self._terms[id]
+
+        keys = []
+        for row in rows:
+            terms = index_terms(row.title, row.category)
+            keys.extend((term, row.id) for term in terms)
+            self._items[row.id] = Suggestion(type=kind, id=row.id, title=row.title, category=row.category)
+            self._terms[row.id] = terms
+
+        keys.sort()
+        self._keys[kind] = keys
+
+    def search(self, prefix: str, limit: int, kind: Optional[ContentType] = None) -> List[Suggestion]:
+
+        """
+        Returns up to `limit` items with a term starting with `prefix`, in term order.
+
+        Args:
+            prefix (str): What the user has typed so far.
+            limit (int): Maximum number of suggestions.
+            kind (ContentType, optional): Only suggest items of this content type.
+
+        Returns:
+            List[Suggestion]: The matching items, each at most once.
+        """
+
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        found: Dict[uuid.UUID, Tuple[str, Suggestion]] = {}
+        for content_type in ([kind] if kind else list(ContentType)):
+            keys = self._keys[content_type]
+            matched = 0
+            i = bisect_left(keys, (prefix,))
+
+            # Each type contributes at most `limit` distinct items before the merge
+            while i < len(keys) and matched < limit and keys[i][0].startswith(prefix):
+                term, id = keys[i]
+                if id not in found:
+                    found[id] = (term, self._items[id])
+                    matched += 1
+                i += 1
+
+        ranked = sorted(found.values(), key=lambda entry: entry[0])
+        return [item for _, item in ranked[:limit]]
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._items),
+            "terms": {str(kind): len(keys) for kind, keys in self._keys.items()},
+        }
+
+
+# Process-wide suggestion index
+suggest_index = PrefixIndex()
@@ -0,0 +1,84 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from starlette.status import HTTP_400_BAD_REQUEST
+from app.utility.CustomException import CustomHttpException
+
+"""
+A script to define sparse fieldsets (`?fields=id,title,image1`) for list endpoints.
+
+The requested fields are pushed down into the SELECT, so only those
+columns leave the database and no ORM instances are built. Rows are then
+serialized through a response model generated with just those fields
+(cached per field combination), straight to JSON bytes. Full listings go
+through the same path with the endpoint's own schema.
+"""
+
+# Columns always selected so keyset pagination can build the next cursor
+KEYSET_COLUMNS = ("id", "created_at")
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+
+    """
+    Validates a comma-separated `fields` parameter against a response schema.
+
+    Args:
+        fields (str, optional): The raw query parameter.
+        schema (Type[BaseModel]): The full response schema of the endpoint.
+
+    Returns:
+        Tuple[str, ...] | None: The requested fields in schema order, or None for the full schema.
+
+    Raises:
+        CustomHttpException: 400 if a field is not part of the schema.
+    """
+
+    if not fields:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise CustomHttpException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(schema.model_fields)}",
+            message="Invalid Fields",
+        )
+
+    return tuple(name for name in schema.model_fields if name in requested) or None
+
+
+def projection_columns(model, fields: Tuple[str, ...]) -> List:
+    names = list(fields) + [name for name in KEYSET_COLUMNS if name not in fields]
+    return [getattr(model, name) for name in names]
+
+
+@lru_cache(maxsize=128)
+def listing_adapter(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> TypeAdapter:
+
+    """
+    Builds (once per field combination) a list adapter over a schema restricted to `fields`.
+
+    Args:
+        schema (Type[BaseModel]): The full response schema.
+        fields (Tuple[str, ...], optional): The fields to keep; None for the full schema.
+
+    Returns:
+        TypeAdapter: Adapter validating and serializing a list of the (projected) model.
+    """
+
+    if fields is None:
+        return TypeAdapter(List[schema])
+
+    projected = create_model(
+        f"{schema.__name__}Projection",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+    return TypeAdapter(List[projected])
+
+
+def serialize_listing(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]], rows: List) -> bytes:
+    adapter = listing_adapter(schema, fields)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
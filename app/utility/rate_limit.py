@@ -0,0 +1,115 @@
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+"""
+A script to define the in-process sliding-window rate limiter.
+
+Each key (client IP, username, ...) keeps the timestamps of its attempts
+within the window. The number of tracked keys is capped so memory stays
+bounded no matter how many distinct IPs or usernames an attacker cycles
+through. When full, only keys whose window has expired are forgotten: a key
+with attempts still in its window is never evicted (that would reset its
+limit), so new keys are rejected until one expires.
+"""
+
+
+class SlidingWindowLimiter:
+
+    """
+    Allows at most `max_attempts` per key within any `window` seconds
+    """
+
+    def __init__(self, max_attempts: int, window: float, max_keys: int):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._attempts: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        # While full of active keys: no key can expire before this (monotonic) time
+        self._full_until = 0.0
+
+        # Counters
+        self.allowed = 0
+        self.rejected = 0
+        self.rejected_full = 0
+
+    def hit(self, key: str) -> Optional[float]:
+
+        """
+        Records an attempt for `key` if it is within the limit.
+
+        Args:
+            key (str): The key to rate limit on.
+
+        Returns:
+            float | None: None if the attempt is allowed, otherwise the number of
+            seconds until the oldest attempt leaves the window.
+        """
+
+        now = time.monotonic()
+        attempts = self._attempts.get(key)
+
+        if attempts is None:
+            if len(self._attempts) >= self.max_keys and not self._make_room(now):
+                self.rejected += 1
+                self.rejected_full += 1
+                return self._full_until - now
+            attempts = deque()
+            self._attempts[key] = attempts
+        else:
+            self._attempts.move_to_end(key)
+
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+
+        if len(attempts) >= self.max_attempts:
+            self.rejected += 1
+            return attempts[0] + self.window - now
+
+        attempts.append(now)
+        self.allowed += 1
+        return None
+
+    def _make_room(self, now: float) -> bool:
+
+        """
+        Forgets the keys whose window has expired.
+
+        Returns:
+            bool: Whether there is room for a new key.
+        """
+
+        if now < self._full_until:
+            return False
+
+        cutoff = now - self.window
+        expired = [key for key, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]
+        for key in expired:
+            del self._attempts[key]
+
+        if len(self._attempts) < self.max_keys:
+            return True
+
+        # Every key is active; rescan only once the earliest of them can have expired
+        self._full_until = min(attempts[-1] for attempts in self._attempts.values()) + self.window
+        return False
+
+    def reset(self, key: str):
+        self._attempts.pop(key, None)
+        self._full_until = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self._attempts),
+            "max_keys": self.max_keys,
+            "max_attempts": self.max_attempts,
+            "window_seconds": self.window,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "rejected_full": self.rejected_full,
+        }
+
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
@@ -0,0 +1,43 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+"""
+A script to define the read-your-writes middleware used with a read replica.
+
+A successful write under /api/ sets the Read_primary cookie; while a client
+carries it, get_read_session serves its reads from the primary. The admin
+panel calls the API cross-site with credentials, so the cookie is sent with
+SameSite=None; Secure, which browsers require for cross-site cookies.
+
+It is a plain ASGI middleware: requests that are not writes are passed
+straight through, and responses are never buffered or copied.
+"""
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class ReadYourWritesMiddleware:
+
+    """
+    Adds the Read_primary cookie to successful write responses under `path_prefix`
+    """
+
+    def __init__(self, app: ASGIApp, cookie_name: str, max_age: int, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.cookie = (
+            f"{cookie_name}=1; Max-Age={max_age}; Path=/; HttpOnly; Secure; SameSite=None"
+        ).encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (scope["type"] != "http"
+                or scope["method"] not in WRITE_METHODS
+                or not scope["path"].startswith(self.path_prefix)):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", self.cookie)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
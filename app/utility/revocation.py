@@ -0,0 +1,91 @@
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+
+"""
+A script to define the in-memory revocation list used by stateless access tokens.
+
+In stateless mode get_active_user authorizes from the JWT claims alone and
+only asks this list whether the token's `jti` has been revoked. Entries
+only need to live until the revoked token would have expired anyway, so
+the list stays small and is pruned on every refresh.
+
+Users who are not ACTIVE are listed too, so deactivating a user locks out
+all of their stateless tokens: at once on the worker that made the change,
+within REVOCATION_REFRESH_SECONDS on the others.
+"""
+
+
+class RevocationList:
+
+    """
+    Exact set of revoked token ids (jti -> unix time after which the entry can be dropped)
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        # Non-ACTIVE users as of the last load, and status changes made on this worker since
+        self._inactive_users: Set[str] = set()
+        self._local_users: Dict[str, Tuple[bool, float]] = {}
+        self.last_refreshed_at: Optional[float] = None
+
+    def revoke(self, jti: Optional[str], expires_at: float):
+        if jti:
+            self._revoked[jti] = max(expires_at, self._revoked.get(jti, 0))
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti in self._revoked
+
+    def set_user_active(self, user_id: Union[str, uuid.UUID], active: bool):
+        self._local_users[str(user_id)] = (active, time.time())
+
+    def is_user_revoked(self, user_id: str) -> bool:
+        local = self._local_users.get(user_id)
+        if local is not None:
+            return not local[0]
+        return user_id in self._inactive_users
+
+    def replace(self, entries: Iterable[Tuple[str, float]], inactive_users: Iterable = (),
+                loaded_at: Optional[float] = None):
+
+        """
+        Swaps in the revocation set loaded from the database.
+
+        Args:
+            entries (Iterable[Tuple[str, float]]): (jti, expires_at) pairs.
+            inactive_users (Iterable): Ids of the users that are not ACTIVE.
+            loaded_at (float, optional): When the snapshot was read; local user status
+                changes made after it are kept.
+        """
+
+        revoked = {}
+        for jti, expires_at in entries:
+            if jti:
+                revoked[jti] = expires_at
+
+        # Keep local revocations the database snapshot may not include yet
+        now = time.time()
+        for jti, expires_at in self._revoked.items():
+            if expires_at > now:
+                revoked.setdefault(jti, expires_at)
+
+        self._revoked = revoked
+        self._inactive_users = {str(user_id) for user_id in inactive_users}
+        loaded_at = now if loaded_at is None else loaded_at
+        self._local_users = {user: entry for user, entry in self._local_users.items() if entry[1] >= loaded_at}
+        self.last_refreshed_at = now
+
+    def prune(self):
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._revoked),
+            "inactive_users": len(self._inactive_users),
+            "last_refreshed_at": self.last_refreshed_at,
+        }
+
+
+# Process-wide revocation list
+revocation_list = RevocationList()
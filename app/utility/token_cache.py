@@ -0,0 +1,214 @@
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Set, Tuple
+from app.core.config import get_settings
+from app.db.enum import UserStatus, UserType
+from app.utility.misc import hash_token
+
+"""
+A script to define the in-process cache of verified access tokens:
+
+1. UserSnapshot: Immutable copy of the user fields the routes rely on
+2. TokenCache: Bounded TTL/LRU mapping of token digest -> UserSnapshot
+3. LatencySamples: Recent get_active_user timings, per resolution path
+
+Revocations reach other workers through the change feed (see token_store);
+a worker that misses them keeps a revoked token for at most the entry TTL,
+hence the cap below.
+"""
+
+# Loading Settings
+settings = get_settings()
+
+# Upper bound on TOKEN_CACHE_TTL_SECONDS
+TOKEN_CACHE_MAX_TTL_SECONDS = 300
+LATENCY_SAMPLE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+
+    """
+    Detached, read-only view of a User returned by get_active_user
+    """
+
+    id: uuid.UUID
+    email: str
+    name: str
+    user_type: UserType
+    user_status: UserStatus
+    first_login: bool
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            user_type=user.user_type,
+            user_status=user.user_status,
+            first_login=user.first_login,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "UserSnapshot":
+        # Only called once the revocation list has ruled out non-ACTIVE users;
+        # first_login is not carried in the claims and reads as False
+        return cls(
+            id=uuid.UUID(payload["uid"]),
+            email=payload["sub"],
+            name=payload.get("name"),
+            user_type=UserType(payload["user_type"]),
+            user_status=UserStatus.ACTIVE,
+            first_login=False,
+        )
+
+
+class LatencySamples:
+
+    """
+    The most recent LATENCY_SAMPLE_SIZE durations of one code path
+    """
+
+    def __init__(self, size: int = LATENCY_SAMPLE_SIZE):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "p50_ms": None, "p99_ms": None}
+        percentile = lambda p: round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+        return {"samples": len(samples), "p50_ms": percentile(0.50), "p99_ms": percentile(0.99)}
+
+
+class TokenCache:
+
+    """
+    Bounded TTL/LRU cache of verified (token -> user snapshot) entries.
+
+    Entries are keyed by the SHA-256 digest of the token so raw JWTs are never
+    held in memory, and indexed by user id so every session of a user can be
+    dropped at once.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = min(ttl, TOKEN_CACHE_MAX_TTL_SECONDS)
+        self._entries: "OrderedDict[bytes, Tuple[float, UserSnapshot]]" = OrderedDict()
+        self._by_user: Dict[uuid.UUID, Set[bytes]] = {}
+        # get_active_user timings: cache hit, DB lookup, stateless claims
+        self.latency: Dict[str, LatencySamples] = {path: LatencySamples() for path in ("cache", "database", "stateless")}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+
+        """
+        Returns the cached snapshot for a token, or None if absent or expired.
+        """
+
+        key = hash_token(token)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, user: UserSnapshot, token_exp: Optional[float] = None):
+
+        """
+        Caches a verified token. The entry never outlives the token's own `exp` claim.
+
+        Args:
+            token (str): The verified access token.
+            user (UserSnapshot): The user the token resolved to.
+            token_exp (float, optional): The token `exp` claim as a unix timestamp.
+        """
+
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+
+        key = hash_token(token)
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + ttl, user)
+        self._by_user.setdefault(user.id, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def invalidate_token(self, token: str):
+        self.invalidate_digest(hash_token(token))
+
+    def invalidate_digest(self, digest: bytes):
+        if digest in self._entries:
+            self._discard(digest)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: uuid.UUID):
+        for key in list(self._by_user.get(user_id, ())):
+            self._discard(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            # Every hit skips the User and AuthToken SELECTs
+            "db_queries_saved": self.hits * 2,
+            "latency": {path: samples.stats() for path, samples in self.latency.items()},
+        }
+
+    def _discard(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry[1].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[1].id]
+
+
+# Process-wide cache instance
+token_cache = TokenCache(
+    max_size=int(settings.TOKEN_CACHE_MAX_SIZE),
+    ttl=float(settings.TOKEN_CACHE_TTL_SECONDS),
+)
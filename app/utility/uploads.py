@@ -0,0 +1,64 @@
+import os
+import shutil
+import uuid
+from typing import Optional
+from fastapi import UploadFile
+from app.core.config import get_logger
+
+"""
+A script to define how uploaded images are stored under the static folder.
+
+Files are only ever removed from inside the static folder: a URL that
+resolves anywhere else (../, symlinks, absolute paths) is refused.
+"""
+
+logger = get_logger()
+
+STATIC_DIR = "static"
+STATIC_URL_PREFIX = "/static/"
+
+
+def save_upload(upload: UploadFile) -> str:
+
+    """
+    Writes an uploaded file to the static folder under a random name.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+
+    Returns:
+        str: The public URL of the stored file (/static/<name>).
+    """
+
+    file_extension = upload.filename.split(".")[-1]
+    file_name = f"{uuid.uuid4()}.{file_extension}"
+    file_path = os.path.join(STATIC_DIR, file_name)
+
+    # The same upload may be referenced more than once (bulk writes)
+    upload.file.seek(0)
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer)
+
+    return f"{STATIC_URL_PREFIX}{file_name}"
+
+
+def remove_upload(url: Optional[str]):
+
+    """
+    Deletes a file stored by save_upload, if it still exists.
+
+    Args:
+        url (str, optional): The public URL of the file.
+    """
+
+    if not url:
+        return
+
+    static_root = os.path.realpath(STATIC_DIR)
+    file_path = os.path.realpath(os.path.join(static_root, url.removeprefix(STATIC_URL_PREFIX)))
+    if not url.startswith(STATIC_URL_PREFIX) or os.path.dirname(file_path) != static_root:
+        logger.error(f"Refusing to remove {url!r}: not a file in {STATIC_DIR}")
+        return
+
+    if os.path.isfile(file_path):
+        os.remove(file_path)
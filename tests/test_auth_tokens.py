@@ -0,0 +1,48 @@
+import pytest
+from datetime import timedelta
+from sqlalchemy import func
+import app.db.session as db_session
+from app.db.token_store import new_auth_token
+from app.routes.auth import get_active_user
+from app.utility.CustomException import CustomHttpException
+from app.utility.misc import create_access_token, create_refresh_token, user_claims
+
+"""
+Tests for access token checks against auth_tokens (needs TEST_DATABASE_URL).
+"""
+
+pytestmark = pytest.mark.anyio
+
+
+async def issue(user, expires_at) -> str:
+
+    """
+    Issues a token pair for `user` whose auth_tokens row expires at `expires_at`,
+    and returns the access token.
+    """
+
+    token = create_access_token(data=user_claims(user))
+    async with db_session.async_session() as session:
+        session.add(new_auth_token(user.id, token, create_refresh_token(data=user_claims(user)), expires_at))
+        await session.commit()
+    return token
+
+
+async def test_token_with_unexpired_row_is_accepted(user):
+    token = await issue(user, func.now() + timedelta(days=30))
+
+    async with db_session.async_read_session() as session:
+        snapshot = await get_active_user(token, session)
+
+    assert snapshot.id == user.id
+
+
+async def test_token_with_expired_row_is_rejected(user):
+    # The JWT itself is still valid; only the row's expires_at has passed
+    token = await issue(user, func.now() - timedelta(minutes=1))
+
+    async with db_session.async_read_session() as session:
+        with pytest.raises(CustomHttpException) as raised:
+            await get_active_user(token, session)
+
+    assert raised.value.status_code == 401
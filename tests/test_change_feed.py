@@ -0,0 +1,23 @@
+from app.db.change_feed import ChangeListener
+
+"""
+Tests for the content versions the change listener tracks.
+"""
+
+
+def test_observed_versions_only_move_forward():
+    listener = ChangeListener(dsn="postgresql://unused", healthcheck_interval=1, max_backoff=1)
+    listener.stats["connected"] = True
+
+    listener.observe("services", 4)
+    assert listener.version("services") == 4
+
+    # A late NOTIFY (or a slower writer's own commit) never moves the version back
+    listener.observe("services", 3)
+    assert listener.version("services") == 4
+
+
+def test_versions_are_unknown_while_disconnected():
+    listener = ChangeListener(dsn="postgresql://unused", healthcheck_interval=1, max_backoff=1)
+    listener.observe("services", 4)
+    assert listener.version("services") is None
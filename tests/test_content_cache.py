@@ -0,0 +1,207 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from starlette.requests import Request
+from app.utility.CustomException import CustomHttpException
+from app.db.schema import ServiceResponse
+from app.db.session import READ_PRIMARY_COOKIE
+import app.utility.content_cache as content_cache_module
+from app.utility.content_cache import CachedListing, ContentCache
+
+"""
+Tests for ContentCache: single-flight loads, shared errors, the coalesce
+timeout, cancellation of the loading or waiting request, and respond() only
+opening a session on a miss.
+"""
+
+pytestmark = pytest.mark.anyio
+
+TABLE = "services"
+PARAMS = ("", None, 10)
+
+
+class Loader:
+
+    """
+    Loader that blocks until released, counting its calls
+    """
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> CachedListing:
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return CachedListing(body=f"load {self.calls}".encode())
+
+
+def new_cache(coalesce_timeout: float = 5) -> ContentCache:
+    return ContentCache(max_entries=10, max_bytes=1 << 20, ttl=60, coalesce_timeout=coalesce_timeout)
+
+
+async def started(*tasks):
+
+    """
+    Lets `tasks` run until they block on the load.
+    """
+
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert not any(task.done() for task in tasks)
+
+
+async def test_concurrent_misses_share_one_load():
+    cache, loader = new_cache(), Loader()
+    tasks = [asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader)) for _ in range(20)]
+    await started(*tasks)
+
+    loader.release.set()
+    listings = await asyncio.gather(*tasks)
+
+    assert loader.calls == 1
+    assert all(listing is listings[0] for listing in listings)
+    assert (cache.loads, cache.coalesced) == (1, 19)
+
+    # Later requests are served from the cache
+    assert await cache.get_or_load(TABLE, PARAMS, loader) is listings[0]
+    assert loader.calls == 1
+
+
+async def test_load_error_reaches_every_waiter_and_is_not_cached():
+    cache, loader = new_cache(), Loader(error=RuntimeError("database down"))
+    tasks = [asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader)) for _ in range(5)]
+    await started(*tasks)
+
+    loader.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert loader.calls == 1
+
+    # The next request loads again
+    loader.error = None
+    await cache.get_or_load(TABLE, PARAMS, loader)
+    assert loader.calls == 2
+
+
+async def test_waiter_gives_up_after_coalesce_timeout():
+    cache, loader = new_cache(coalesce_timeout=0.05), Loader()
+    leader = asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader))
+    await started(leader)
+
+    with pytest.raises(CustomHttpException) as raised:
+        await cache.get_or_load(TABLE, PARAMS, loader)
+    assert raised.value.status_code == 503
+    assert cache.coalesce_timeouts == 1
+
+    # The shared load itself carries on
+    loader.release.set()
+    assert (await leader).body == b"load 1"
+
+
+async def test_waiter_takes_over_when_loading_request_is_cancelled():
+    cache, loader = new_cache(), Loader()
+    leader = asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader))
+    await started(leader)
+    follower = asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader))
+    await started(follower)
+
+    leader.cancel()
+    await started(follower)
+    loader.release.set()
+
+    assert (await follower).body == b"load 2"
+    assert leader.cancelled()
+    assert loader.calls == 2
+
+
+async def test_cancelled_waiter_leaves_the_load_running():
+    cache, loader = new_cache(), Loader()
+    leader = asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader))
+    await started(leader)
+    follower = asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader))
+    await started(follower)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+
+    loader.release.set()
+    assert (await leader).body == b"load 1"
+    assert loader.calls == 1
+
+
+async def test_load_started_before_an_invalidation_is_not_cached():
+    cache, loader = new_cache(), Loader()
+    leader = asyncio.create_task(cache.get_or_load(TABLE, PARAMS, loader))
+    await started(leader)
+
+    cache.invalidate(TABLE)
+    loader.release.set()
+    await leader
+
+    assert cache.get(TABLE, PARAMS) is None
+
+
+class VersionSession:
+
+    """
+    Session stand-in answering the content version query
+    """
+
+    async def execute(self, stmt):
+        return self
+
+    def scalar(self):
+        return 3
+
+
+async def test_respond_only_opens_a_session_on_a_miss():
+    cache, opened = new_cache(), []
+
+    @asynccontextmanager
+    async def open_session():
+        opened.append(True)
+        yield VersionSession()
+
+    async def load(db) -> CachedListing:
+        return CachedListing(body=b"[]")
+
+    def request(if_none_match: str = None) -> Request:
+        headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+        return Request({"type": "http", "method": "GET", "path": "/api/services", "headers": headers})
+
+    miss = await cache.respond(request(), open_session, TABLE, ServiceResponse, PARAMS, load)
+    hit = await cache.respond(request(), open_session, TABLE, ServiceResponse, PARAMS, load)
+    not_modified = await cache.respond(request(miss.headers["etag"]), open_session, TABLE, ServiceResponse, PARAMS, load)
+
+    assert (miss.status_code, hit.status_code, not_modified.status_code) == (200, 200, 304)
+    assert len(opened) == 1
+
+
+async def test_reads_pinned_to_the_primary_bypass_the_cache(monkeypatch):
+    monkeypatch.setattr(content_cache_module, "read_engine", object())
+    cache, opened = new_cache(), []
+
+    @asynccontextmanager
+    async def open_session():
+        opened.append(True)
+        yield VersionSession()
+
+    async def load(db) -> CachedListing:
+        return CachedListing(body=f"read {len(opened)}".encode())
+
+    pinned = Request({"type": "http", "method": "GET", "path": "/api/services",
+                      "headers": [(b"cookie", f"{READ_PRIMARY_COOKIE}=1".encode())]})
+    replica = Request({"type": "http", "method": "GET", "path": "/api/services", "headers": []})
+
+    cached = await cache.respond(replica, open_session, TABLE, ServiceResponse, PARAMS, load)
+    first = await cache.respond(pinned, open_session, TABLE, ServiceResponse, PARAMS, load)
+    second = await cache.respond(pinned, open_session, TABLE, ServiceResponse, PARAMS, load)
+
+    assert (cached.body, first.body, second.body) == (b"read 1", b"read 2", b"read 3")
+    assert cache.pinned_reads == 2
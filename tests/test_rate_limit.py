@@ -0,0 +1,45 @@
+from starlette.requests import Request
+from app.utility.client_ip import client_ip, parse_networks
+from app.utility.rate_limit import SlidingWindowLimiter
+
+"""
+Tests for the login rate limiter and the client address it keys on.
+"""
+
+
+def make_request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "POST", "path": "/auth/login", "headers": headers, "client": (peer, 50000)})
+
+
+def test_full_limiter_keeps_active_windows():
+    limiter = SlidingWindowLimiter(max_attempts=2, window=60, max_keys=2)
+    assert limiter.hit("target") is None
+    assert limiter.hit("target") is None
+    assert limiter.hit("filler") is None
+
+    # Cycling new keys cannot push the target's window out
+    for n in range(10):
+        assert limiter.hit(f"attacker-{n}") is not None
+    assert limiter.hit("target") is not None
+    assert limiter.stats()["rejected_full"] == 10
+
+
+def test_full_limiter_forgets_expired_windows():
+    limiter = SlidingWindowLimiter(max_attempts=2, window=0, max_keys=1)
+    assert limiter.hit("first") is None
+    assert limiter.hit("second") is None
+    assert limiter.stats()["tracked_keys"] == 1
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peers():
+    trusted = parse_networks("10.0.0.0/8")
+    assert client_ip(make_request("203.0.113.9", "198.51.100.1"), trusted) == "203.0.113.9"
+
+
+def test_client_ip_takes_the_first_untrusted_hop_behind_a_trusted_proxy():
+    trusted = parse_networks("10.0.0.0/8, 192.0.2.1")
+    request = make_request("10.0.0.5", "1.2.3.4, 198.51.100.7, 192.0.2.1")
+    # The client cannot pick its key by forging the leftmost entries
+    assert client_ip(request, trusted) == "198.51.100.7"
+    assert client_ip(make_request("10.0.0.5"), trusted) == "10.0.0.5"
@@ -0,0 +1,93 @@
+import uuid
+import pytest
+from sqlalchemy import select
+from starlette.requests import Request
+import app.db.session as db_session
+from app.db.models import Service
+from app.utility.read_your_writes import ReadYourWritesMiddleware
+
+"""
+Tests for read-your-writes: the cookie set on writes, and reads pinned to the
+primary while a client carries it.
+"""
+
+COOKIE = db_session.READ_PRIMARY_COOKIE
+
+
+async def call(method: str, path: str, status: int):
+
+    """
+    Sends one request through the middleware wrapped around an app answering `status`,
+    and returns the response headers.
+    """
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = ReadYourWritesMiddleware(endpoint, cookie_name=COOKIE, max_age=10)
+    await middleware({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    return messages[0]["headers"]
+
+
+def cookies(headers) -> list:
+    return [value.decode() for name, value in headers if name == b"set-cookie"]
+
+
+@pytest.mark.anyio
+async def test_successful_write_sets_cross_site_cookie():
+    [cookie] = cookies(await call("POST", "/api/services", 200))
+
+    assert cookie.startswith(f"{COOKIE}=1;")
+    for attribute in ("Max-Age=10", "Path=/", "HttpOnly", "Secure", "SameSite=None"):
+        assert attribute in cookie
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("method, path, status", [
+    ("GET", "/api/services", 200),
+    ("POST", "/api/services", 422),
+    ("POST", "/auth/login", 200),
+])
+async def test_reads_failures_and_other_paths_set_no_cookie(method, path, status):
+    assert cookies(await call(method, path, status)) == []
+
+
+def request_with(cookie_header: str = "") -> Request:
+    headers = [(b"cookie", cookie_header.encode())] if cookie_header else []
+    return Request({"type": "http", "method": "GET", "path": "/api/services", "headers": headers})
+
+
+async def read_title(request: Request, id: uuid.UUID):
+    reads = db_session.get_read_session(request)
+    session = await reads.__anext__()
+    try:
+        return await session.scalar(select(Service.title).where(Service.id == id))
+    finally:
+        await reads.aclose()
+
+
+@pytest.mark.anyio
+async def test_reads_after_write_go_to_primary(engine, replica_engine):
+    service = Service(title=f"read-your-writes {uuid.uuid4().hex}")
+    async with db_session.async_session() as session:
+        session.add(service)
+        await session.commit()
+
+    try:
+        # The replica instance never sees the write; the pinned client reads it from the primary
+        assert await read_title(request_with(), service.id) is None
+        assert await read_title(request_with(f"{COOKIE}=1"), service.id) == service.title
+
+    finally:
+        async with db_session.async_session() as session:
+            await session.execute(Service.__table__.delete().where(Service.id == service.id))
+            await session.commit()
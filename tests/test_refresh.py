@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from sqlalchemy import func, select
+import app.db.session as db_session
+from app.db.enum import TokenStatus
+from app.db.models import AuthToken
+from app.db.schema import RefreshTokenRequest
+from app.db.token_store import new_auth_token
+from app.routes.refresh import refresh_token
+from app.utility.CustomException import CustomHttpException
+from app.utility.misc import create_access_token, create_refresh_token, user_claims
+
+"""
+Tests for refresh token rotation (needs TEST_DATABASE_URL).
+"""
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_REFRESHES = 10
+
+
+async def refresh_with(token: str):
+    async with db_session.async_session() as session:
+        return await refresh_token(RefreshTokenRequest(refresh_token=token), session)
+
+
+async def test_concurrent_refreshes_rotate_once(user):
+    refresh = create_refresh_token(data=user_claims(user))
+    async with db_session.async_session() as session:
+        session.add(new_auth_token(user.id, create_access_token(data=user_claims(user)), refresh,
+                                   func.now() + timedelta(days=30)))
+        await session.commit()
+
+    results = await asyncio.gather(*[refresh_with(refresh) for _ in range(CONCURRENT_REFRESHES)],
+                                   return_exceptions=True)
+
+    succeeded = [result for result in results if not isinstance(result, Exception)]
+    rejected = [result for result in results if isinstance(result, CustomHttpException)]
+    assert len(succeeded) == 1
+    assert len(rejected) == CONCURRENT_REFRESHES - 1
+    assert all(result.status_code == 401 for result in rejected)
+
+    # One row was deactivated and exactly one replacement issued
+    async with db_session.async_session() as session:
+        statuses = (await session.execute(select(AuthToken.status).where(AuthToken.user_id == user.id))).scalars().all()
+    assert sorted(statuses, key=str) == sorted([TokenStatus.ACTIVE, TokenStatus.INACTIVE], key=str)
@@ -0,0 +1,42 @@
+import uuid
+from app.db.enum import UserStatus, UserType
+from app.db.token_store import evict_changed_sessions
+from app.utility.token_cache import TOKEN_CACHE_MAX_TTL_SECONDS, TokenCache, UserSnapshot, token_cache
+
+"""
+Tests for the verified-token cache and its cross-worker eviction.
+"""
+
+
+def snapshot(user_id: uuid.UUID) -> UserSnapshot:
+    return UserSnapshot(id=user_id, email="user@example.com", name="User", user_type=UserType.ADMIN,
+                        user_status=UserStatus.ACTIVE, first_login=False)
+
+
+def test_ttl_is_capped():
+    cache = TokenCache(max_size=10, ttl=TOKEN_CACHE_MAX_TTL_SECONDS * 10)
+    assert cache.ttl == TOKEN_CACHE_MAX_TTL_SECONDS
+
+
+def test_session_change_notification_evicts_the_users_tokens():
+    revoked, kept = uuid.uuid4(), uuid.uuid4()
+    token_cache.set("revoked-token", snapshot(revoked))
+    token_cache.set("kept-token", snapshot(kept))
+
+    evict_changed_sessions("auth_tokens", [revoked])
+    assert token_cache.get("revoked-token") is None
+    assert token_cache.get("kept-token") is not None
+
+    # Reconnect: notifications may have been missed
+    evict_changed_sessions("auth_tokens", None)
+    assert token_cache.get("kept-token") is None
+
+
+def test_latency_percentiles():
+    cache = TokenCache(max_size=10, ttl=60)
+    for ms in range(1, 101):
+        cache.latency["cache"].record(ms / 1000)
+
+    latency = cache.stats()["latency"]
+    assert latency["cache"] == {"samples": 100, "p50_ms": 51.0, "p99_ms": 100.0}
+    assert latency["database"]["samples"] == 0
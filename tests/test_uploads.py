@@ -0,0 +1,53 @@
+import os
+import pytest
+from types import SimpleNamespace
+from app.db.content_store import SERVICE_CONTENT, image_reference_error
+from app.utility.uploads import remove_upload
+
+"""
+Tests for image references in bulk writes and for removing stored uploads.
+"""
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "image.png").write_bytes(b"png")
+    (tmp_path / "main.py").write_text("keep me")
+    return tmp_path
+
+
+def test_remove_upload_deletes_a_stored_file(static_dir):
+    remove_upload("/static/image.png")
+    assert not (static_dir / "static" / "image.png").exists()
+
+
+@pytest.mark.parametrize("url", [
+    "/static/../main.py",
+    "/static/%2e%2e/main.py",
+    "/main.py",
+    "static/../main.py",
+    "/static/",
+])
+def test_remove_upload_refuses_paths_outside_static(static_dir, url):
+    remove_upload(url)
+    assert (static_dir / "main.py").read_text() == "keep me"
+    assert (static_dir / "static" / "image.png").exists()
+
+
+def test_remove_upload_refuses_symlinks_out_of_static(static_dir):
+    os.symlink(static_dir / "main.py", static_dir / "static" / "link.py")
+    remove_upload("/static/link.py")
+    assert (static_dir / "main.py").exists()
+
+
+def test_bulk_items_only_reference_uploads_or_their_own_image():
+    uploads = {"new.png": object()}
+    current = SimpleNamespace(image1="/static/own.png", image2=None)
+
+    assert image_reference_error(SERVICE_CONTENT, {"image1": "new.png"}, uploads) is None
+    assert image_reference_error(SERVICE_CONTENT, {"image1": "/static/own.png"}, uploads, current=current) is None
+    assert image_reference_error(SERVICE_CONTENT, {"image1": "/static/own.png"}, uploads) is not None
+    assert image_reference_error(SERVICE_CONTENT, {"image1": "/static/other.png"}, uploads, current=current) is not None
+    assert image_reference_error(SERVICE_CONTENT, {"image2": "/static/../app/main.py"}, uploads, current=current) is not None